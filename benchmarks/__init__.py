@@ -0,0 +1,5 @@
+"""Benchmarks of the mbweather ingest pipeline, run from the repository
+root with python -m benchmarks."""
+import os
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
@@ -0,0 +1,65 @@
+"""Run the benchmarks: python -m benchmarks [-k NAME] [--save]
+
+Fails when a metric regressed against benchmarks/baselines.json. With
+--save the results become the new baselines.
+"""
+import argparse
+import asyncio
+import sys
+
+from . import BASELINES
+
+# Importing the benchmark modules registers their benchmarks
+from . import (  # noqa: F401
+    bench_decode,
+    bench_export,
+    bench_forecast,
+    bench_history,
+    bench_import,
+    bench_observation,
+    bench_poll,
+    bench_push,
+    bench_scheduler,
+    bench_startup,
+    bench_timestamps,
+)
+from .harness import BENCHMARKS, load_baselines, run, save_baselines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "-k", dest="names", action="append", help="only run benchmarks containing NAME"
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="store the results as the baselines"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="fraction a timing may be worse than its baseline",
+    )
+    parser.add_argument("--baselines", default=BASELINES)
+    args = parser.parse_args()
+
+    names = [
+        name
+        for name in BENCHMARKS
+        if not args.names or any(part in name for part in args.names)
+    ]
+    baselines = load_baselines(args.baselines)
+    results, failures = asyncio.run(run(names, baselines, args.tolerance))
+
+    if args.save:
+        baselines.update(results)
+        save_baselines(args.baselines, baselines)
+        print(f"Saved baselines of {len(results)} benchmarks to {args.baselines}")
+        return 0
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""Benchmark of decoding backfills with a growing number of workers."""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import time
+
+from custom_components.mbweather.meteobridge import TEMPLATE, Meteobridge
+from tests.simulator import PASSWORD, USERNAME, MeteobridgeSimulator
+
+from .harness import benchmark
+
+WORKER_COUNTS = (1, 2, 4, 8)
+# Backfills decoded at the same time, each a day of 10 second rows
+BACKFILLS = 8
+ROWS = 8640
+
+
+async def _decode_all(mb_server, batches) -> float:
+    """Decode every batch at the same time, and return the seconds taken."""
+    start = time.perf_counter()
+    await asyncio.gather(*[mb_server.decode_batch(batch) for batch in batches])
+    return time.perf_counter() - start
+
+
+@benchmark
+async def bench_decode():
+    """Rows decoded per second by BACKFILLS backfills decoded at the same
+    time, in the default thread pool and with 1, 2, 4 and 8 worker
+    processes. Workers only help with more than one CPU."""
+    simulator = MeteobridgeSimulator()
+    day = ["\n".join(simulator.payload(TEMPLATE) for _ in range(ROWS))]
+    batches = [day] * BACKFILLS
+    rows = ROWS * BACKFILLS
+
+    metrics = {}
+    mb_server = Meteobridge(None, "192.0.2.1", USERNAME, PASSWORD, "metric")
+    metrics["threads_rows_per_s"] = rows / await _decode_all(mb_server, batches)
+    for workers in WORKER_COUNTS:
+        with ProcessPoolExecutor(workers) as executor:
+            mb_server = Meteobridge(
+                None, "192.0.2.1", USERNAME, PASSWORD, "metric", executor=executor
+            )
+            # Start the workers before timing
+            await _decode_all(mb_server, [day] * workers)
+            seconds = await _decode_all(mb_server, batches)
+        metrics[f"w{workers}_rows_per_s"] = rows / seconds
+    return metrics
@@ -0,0 +1,71 @@
+"""Benchmark of the export of polled data to a local UNIX socket reader."""
+import asyncio
+import os
+import struct
+import tempfile
+import time
+
+from custom_components.mbweather.export import (
+    BATCH_SIZE,
+    QUEUE_SIZE,
+    Exporter,
+    SocketSink,
+)
+from custom_components.mbweather.meteobridge import TEMPLATE, Meteobridge
+from tests.simulator import PASSWORD, USERNAME, MeteobridgeSimulator
+
+from .harness import benchmark
+
+RECORDS = 50000
+
+
+async def _count_frames(reader, received: list, done: asyncio.Event) -> None:
+    """Count the length-prefixed records of reader in received[0], until
+    the connection is closed."""
+    try:
+        while True:
+            (length,) = struct.unpack(">I", await reader.readexactly(4))
+            await reader.readexactly(length)
+            received[0] += 1
+    except asyncio.IncompleteReadError:
+        done.set()
+
+
+@benchmark
+async def bench_export():
+    """Polls exported through an Exporter to a reader on a UNIX socket,
+    added a batch at a time, as fast as the queue empties."""
+    simulator = MeteobridgeSimulator()
+    mb_server = Meteobridge(None, "192.0.2.1", USERNAME, PASSWORD, "metric")
+    records = [
+        {"station": "bench", **mb_server._decode(simulator.payload(TEMPLATE))}
+        for _ in range(BATCH_SIZE)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "export.sock")
+        received = [0]
+        done = asyncio.Event()
+        server = await asyncio.start_unix_server(
+            lambda reader, writer: _count_frames(reader, received, done), path
+        )
+        exporter = Exporter(SocketSink(path))
+        exporter.start()
+
+        start = time.perf_counter()
+        for _ in range(RECORDS // BATCH_SIZE):
+            # Only add while the queue has room, so none are dropped
+            while len(exporter._queue) > QUEUE_SIZE - BATCH_SIZE:
+                await asyncio.sleep(0)
+            for record in records:
+                exporter.add(record)
+        await exporter.close()
+        await done.wait()
+        elapsed = time.perf_counter() - start
+
+        server.close()
+        await server.wait_closed()
+    return {
+        "records_per_s": received[0] / elapsed,
+        "dropped": exporter.dropped,
+    }
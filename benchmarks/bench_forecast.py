@@ -0,0 +1,36 @@
+"""Benchmarks of the forecast attribute of the weather entity on a tick."""
+from .bench_poll import create_weather, entity_benchmark
+from .harness import benchmark
+
+
+@benchmark
+async def bench_forecast_attributes():
+    """state_attributes of the weather entity with a 48 hour forecast, as
+    written on every tick between two Dark Sky updates."""
+
+    def read(hass, coordinator, mb_server):
+        weather = create_weather(hass, coordinator, mb_server)
+
+        def tick():
+            weather.state_attributes
+
+        return tick
+
+    return await entity_benchmark(read)
+
+
+@benchmark
+async def bench_forecast_attributes_rebuilt():
+    """state_attributes with the forecast rebuilt on every tick, as before
+    it was built once per Dark Sky update, to compare with."""
+
+    def read(hass, coordinator, mb_server):
+        weather = create_weather(hass, coordinator, mb_server)
+
+        def tick():
+            weather._forecast = weather._build_forecast()
+            weather.state_attributes
+
+        return tick
+
+    return await entity_benchmark(read)
@@ -0,0 +1,69 @@
+"""Benchmark of the history store with a year of 10 second samples."""
+from array import array
+import os
+import tempfile
+import time
+
+from custom_components.mbweather.history import SECONDS_PER_DAY, HistoryStore
+from custom_components.mbweather.meteobridge import NUMERIC_KEYS
+
+from .harness import benchmark
+
+START = 1767225600  # 2026-01-01 00:00 UTC
+STEP = 10
+DAYS = 365
+
+
+def _day_records(history, day: int) -> list:
+    """Return the records of one day of samples."""
+    width = len(history.keys) + 1
+    start = START + day * SECONDS_PER_DAY
+    values = array("d", range(width)) * (SECONDS_PER_DAY // STEP)
+    for index in range(SECONDS_PER_DAY // STEP):
+        values[index * width] = start + index * STEP
+    return [values[index : index + width] for index in range(0, len(values), width)]
+
+
+def _timed_query(history, start: float, end: float):
+    """Return the records read by a query and its duration in seconds."""
+    begin = time.perf_counter()
+    columns = history.query(start, end)
+    return len(columns["time"]), time.perf_counter() - begin
+
+
+@benchmark
+async def bench_history():
+    """Appending a year of samples a day at a time, and reading back the
+    last hour, a day, a month and the whole year."""
+    with tempfile.TemporaryDirectory() as path:
+        history = HistoryStore(path, NUMERIC_KEYS)
+        elapsed = 0.0
+        for day in range(DAYS):
+            records = _day_records(history, day)
+            begin = time.perf_counter()
+            history.write(records)
+            elapsed += time.perf_counter() - begin
+        count = DAYS * SECONDS_PER_DAY // STEP
+        metrics = {"append_records_per_s": count / elapsed}
+        metrics["disk_kib"] = (
+            sum(
+                os.path.getsize(os.path.join(directory, name))
+                for directory, _, names in os.walk(path)
+                for name in names
+            )
+            / 1024
+        )
+
+        end = START + DAYS * SECONDS_PER_DAY
+        for name, seconds in (
+            ("hour", 3600),
+            ("day", SECONDS_PER_DAY),
+            ("month", 30 * SECONDS_PER_DAY),
+        ):
+            # Best of a few reads, the segments are cached after the first
+            best = min(_timed_query(history, end - seconds, end)[1] for _ in range(5))
+            metrics[f"read_{name}_ms"] = best * 1000
+        read, seconds = _timed_query(history, START, end)
+        assert read == count
+        metrics["read_year_records_per_s"] = count / seconds
+    return metrics
@@ -0,0 +1,62 @@
+"""Benchmark of the time it takes to import the integration."""
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from .harness import benchmark
+
+RUNS = 5
+PACKAGE = "custom_components.mbweather"
+# Loaded by Home Assistant before any integration, so not counted
+PRELOADED = (
+    "homeassistant.const",
+    "homeassistant.core",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.entity",
+    "homeassistant.helpers.event",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.temperature",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.setup",
+)
+# A line of -X importtime: self and cumulative µs, and the module
+_IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def _import_package() -> tuple:
+    """Import the package in a new interpreter, after what Home Assistant
+    has loaded. Returns the cumulative µs and the modules it imported."""
+    code = "; ".join(f"import {module}" for module in PRELOADED + (PACKAGE,))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stderr=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    )
+    # Imports are listed before the module importing them
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match is None:
+            continue
+        if match.group(4) == PACKAGE:
+            return int(match.group(2)), len(modules) + 1
+        if match.group(3):
+            modules.append(match.group(4))
+        else:
+            modules.clear()
+    raise RuntimeError(f"{PACKAGE} missing from the -X importtime output")
+
+
+@benchmark
+async def bench_import():
+    """Import time of the integration in a fresh interpreter, median of
+    RUNS, and the number of modules it loads."""
+    runs = [_import_package() for _ in range(RUNS)]
+    return {
+        "import_us": statistics.median(micros for micros, _ in runs),
+        "modules": runs[0][1],
+    }
@@ -0,0 +1,54 @@
+"""Benchmark of the memory held by many decoded Observations."""
+import gc
+import tracemalloc
+
+from custom_components.mbweather.meteobridge import (
+    OBSERVATION_KEYS,
+    TEMPLATE,
+    Meteobridge,
+    Observation,
+)
+from tests.simulator import PASSWORD, USERNAME, MeteobridgeSimulator
+
+from .harness import benchmark
+
+OBSERVATIONS = 100000
+# Distinct polls, decoded over and over into new values
+PAYLOADS = 1000
+
+
+def _allocated(build):
+    """Return the bytes still allocated after calling build, with its
+    result kept, and the result."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        allocated = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    return allocated, kept
+
+
+@benchmark
+async def bench_observation():
+    """100k Observations decoded from simulated polls, as kept in a ring
+    buffer, and the same values held as an Observation or a dict each."""
+    simulator = MeteobridgeSimulator()
+    payloads = [simulator.payload(TEMPLATE) for _ in range(PAYLOADS)]
+    payloads *= OBSERVATIONS // PAYLOADS
+    mb_server = Meteobridge(None, "192.0.2.1", USERNAME, PASSWORD, "metric")
+
+    decoded, observations = _allocated(
+        lambda: [mb_server._decode(payload) for payload in payloads]
+    )
+    rows = [observation._values for observation in observations]
+    # The values are shared, so these are the bytes of the records only
+    slotted = _allocated(lambda: [Observation(list(row)) for row in rows])[0]
+    dicts = _allocated(lambda: [dict(zip(OBSERVATION_KEYS, row)) for row in rows])[0]
+    return {
+        "decoded_100k_kib": decoded / 1024,
+        "observation_bytes": slotted / OBSERVATIONS,
+        "dict_bytes": dicts / OBSERVATIONS,
+    }
@@ -0,0 +1,269 @@
+"""Benchmarks of the poll path, from the request to the entity properties."""
+import asyncio
+from datetime import timedelta
+from itertools import cycle
+import logging
+
+from homeassistant import core
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util.unit_system import METRIC_SYSTEM
+
+from custom_components.mbweather.binary_sensor import (
+    SENSOR_TYPES as BINARY_SENSOR_TYPES,
+    MBweatherBinarySensor,
+)
+from custom_components.mbweather.meteobridge import FIELDS, TEMPLATE, Conversion
+from custom_components.mbweather.meteobridge import Meteobridge
+from custom_components.mbweather.sensor import SENSOR_TYPES, MBWeatherSensor
+from custom_components.mbweather.weather import DarkSkyData, DarkSkyWeather
+from tests.simulator import PASSWORD, USERNAME, MeteobridgeSimulator
+
+from .harness import benchmark, measure, simulator_process
+
+_LOGGER = logging.getLogger(__name__)
+
+POLLS = 1000
+ROWS = 1000
+TICKS = 2000
+
+
+async def create_station(hass, host: str, unit_system: str = "metric"):
+    """Return a Meteobridge of host and its coordinator, after a first poll."""
+    mb_server = Meteobridge(None, host, USERNAME, PASSWORD, unit_system)
+    coordinator = DataUpdateCoordinator(
+        hass,
+        _LOGGER,
+        name=host,
+        update_method=mb_server.update,
+        update_interval=timedelta(seconds=10),
+    )
+    await coordinator.async_refresh()
+    return mb_server, coordinator
+
+
+def raw_rows(count: int = ROWS) -> list:
+    """Return the raw field values of count simulated polls."""
+    simulator = MeteobridgeSimulator()
+    rows = []
+    for _ in range(count):
+        simulator.advance()
+        rows.append(simulator.render(TEMPLATE).split(";", len(FIELDS) + 1)[2:])
+    return rows
+
+
+def create_hass():
+    """Return a Home Assistant for the entities to read their config from."""
+    hass = core.HomeAssistant()
+    hass.config.units = METRIC_SYSTEM
+    # Set when stopped, instead of stopping the event loop
+    hass._stopped = asyncio.Event()
+    return hass
+
+
+def dark_sky_response(now: float, hours: int = 48, days: int = 8) -> dict:
+    """Return a Dark Sky forecast response, as the weather entity gets it."""
+    return {
+        "flags": {"units": "ca"},
+        "currently": {
+            "time": now,
+            "icon": "partly-cloudy-day",
+            "precipProbability": 0.2,
+            "ozone": 310.2,
+            "visibility": 16.093,
+        },
+        "hourly": {
+            "data": [
+                {
+                    "time": now + hour * 3600,
+                    "icon": "rain" if hour % 7 == 0 else "cloudy",
+                    "temperature": 12 + hour % 9,
+                    "precipIntensity": 0.4 * (hour % 3),
+                }
+                for hour in range(hours)
+            ]
+        },
+        "daily": {
+            "data": [
+                {
+                    "time": now + day * 86400,
+                    "icon": "clear-day",
+                    "temperatureHigh": 18 + day,
+                    "temperatureLow": 8 + day,
+                    "precipIntensity": 0.1 * day,
+                    "windSpeed": 3.5,
+                    "windBearing": 240,
+                }
+                for day in range(days)
+            ]
+        },
+    }
+
+
+def create_weather(hass, coordinator, mb_server, mode: str = "hourly"):
+    """Return a weather entity holding a Dark Sky forecast, as after its
+    first update."""
+    dark_sky = DarkSkyData(None, "key", 55.7, 12.6, "en", "ca")
+    dark_sky.data = dark_sky_response(coordinator.data["timestamp"])
+    dark_sky.currently = dark_sky.data["currently"]
+    dark_sky.hourly = dark_sky.data["hourly"]["data"]
+    dark_sky.daily = dark_sky.data["daily"]["data"]
+
+    weather = DarkSkyWeather("Bench", dark_sky, mode, coordinator, mb_server)
+    weather.hass = hass
+    weather._ds_data = dark_sky.data
+    weather._ds_currently = dark_sky.currently
+    weather._ds_hourly = dark_sky.hourly
+    weather._ds_daily = dark_sky.daily
+    weather._forecast = weather._build_forecast()
+    return weather
+
+
+@benchmark
+async def bench_poll():
+    """Meteobridge.update against a simulated Logger, kept alive."""
+    async with simulator_process() as host:
+        mb_server = Meteobridge(None, host, USERNAME, PASSWORD, "metric")
+        await mb_server.update()
+        metrics = await measure(mb_server.update, POLLS, "polls")
+        await mb_server.close()
+    return metrics
+
+
+@benchmark
+async def bench_conversion():
+    """Conversion of a row of raw Logger values with a conversion plan."""
+    rows = raw_rows()
+    conversion = Conversion()
+    plan = conversion.plan([field[2] for field in FIELDS], "metric")
+    rows = cycle(rows)
+
+    def convert():
+        conversion.apply(plan, next(rows))
+
+    return await measure(convert, TICKS * 10, "rows")
+
+
+@benchmark
+async def bench_conversion_methods():
+    """Conversion of the same rows with a Conversion method call per field,
+    as before conversion plans, to compare bench_conversion with."""
+    rows = raw_rows()
+    conversion = Conversion()
+    methods = {
+        "temperature": conversion.temperature,
+        "volume": conversion.volume,
+        "rate": conversion.rate,
+        "pressure": conversion.pressure,
+        "speed": conversion.speed,
+        "float": lambda value, unit: value,
+    }
+    steps = [methods.get(field[2]) for field in FIELDS]
+    rows = cycle(rows)
+
+    def convert():
+        converted = []
+        for method, value in zip(steps, next(rows)):
+            if method is None:
+                converted.append(value)
+                continue
+            try:
+                converted.append(method(float(value), "metric"))
+            except ValueError:
+                converted.append(None)
+
+    return await measure(convert, TICKS * 10, "rows")
+
+
+@benchmark
+async def bench_conversion_columns():
+    """Conversion of a backfill of ROWS rows, column by column."""
+    rows = raw_rows()
+    conversion = Conversion()
+    plan = conversion.plan([field[2] for field in FIELDS], "metric")
+    columns = list(zip(*rows))
+
+    def convert():
+        conversion.apply_columns(plan, columns)
+
+    metrics = await measure(convert, 20, "batches")
+    return {
+        "rows_per_s": metrics.pop("batches_per_s") * ROWS,
+        "cpu_us": metrics["cpu_us"] / ROWS,
+        "alloc_kib": metrics["alloc_kib"],
+    }
+
+
+async def entity_benchmark(read):
+    """Measure read(hass, coordinator, mb_server) once per simulated tick."""
+    hass = create_hass()
+    async with simulator_process() as host:
+        mb_server, coordinator = await create_station(hass, host)
+        tick = read(hass, coordinator, mb_server)
+        metrics = await measure(tick, TICKS, "ticks")
+        await mb_server.close()
+    await hass.async_stop(force=True)
+    return metrics
+
+
+@benchmark
+async def bench_sensor_properties():
+    """State and attributes of every sensor type, as written on a tick."""
+
+    def read(hass, coordinator, mb_server):
+        sensors = [
+            MBWeatherSensor(coordinator, mb_server, key, "mbweather", "metric", "ms")
+            for key in SENSOR_TYPES
+        ]
+
+        def tick():
+            for sensor in sensors:
+                sensor.state
+                sensor.unit_of_measurement
+                sensor.icon
+                sensor.device_class
+                sensor.device_state_attributes
+                sensor.available
+
+        return tick
+
+    return await entity_benchmark(read)
+
+
+@benchmark
+async def bench_binary_sensor_properties():
+    """State and attributes of every binary sensor type, as on a tick."""
+
+    def read(hass, coordinator, mb_server):
+        sensors = [
+            MBweatherBinarySensor(coordinator, mb_server, key, "mbweather")
+            for key in BINARY_SENSOR_TYPES
+        ]
+
+        def tick():
+            for sensor in sensors:
+                sensor.is_on
+                sensor.icon
+                sensor.device_class
+                sensor.device_state_attributes
+                sensor.available
+
+        return tick
+
+    return await entity_benchmark(read)
+
+
+@benchmark
+async def bench_weather_properties():
+    """State and attributes of the weather entity, as on a tick."""
+
+    def read(hass, coordinator, mb_server):
+        weather = create_weather(hass, coordinator, mb_server)
+
+        def tick():
+            weather.state
+            weather.state_attributes
+            weather.available
+
+        return tick
+
+    return await entity_benchmark(read)
@@ -0,0 +1,80 @@
+"""Benchmark of data pushed by a Logger, from the request to the entities."""
+from datetime import timedelta
+import logging
+import time
+
+import aiohttp
+from aiohttp import web
+
+from homeassistant import core
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from custom_components.mbweather import _checked_update
+from custom_components.mbweather.meteobridge import TEMPLATE, Meteobridge
+from custom_components.mbweather.push import PUSH_URL, MeteobridgePushView
+from tests.simulator import PASSWORD, USERNAME, MeteobridgeSimulator
+
+from .bench_poll import create_hass
+from .harness import benchmark, percentile
+
+_LOGGER = logging.getLogger(__name__)
+
+PAYLOADS = 2000
+
+
+@benchmark
+async def bench_push():
+    """Payloads replayed back to back to the push view of a station. The
+    latency runs from sending a payload to the coordinator listeners being
+    called. The replaying client runs in the same process."""
+    hass = create_hass()
+    hass.state = core.CoreState.running
+    mb_server = Meteobridge(
+        None, "192.0.2.1", USERNAME, PASSWORD, "metric", push_only=True
+    )
+    coordinator = DataUpdateCoordinator(
+        hass,
+        _LOGGER,
+        name="bench",
+        update_method=_checked_update(mb_server.update),
+        update_interval=timedelta(seconds=20),
+    )
+    updated = []
+    coordinator.async_add_listener(lambda: updated.append(time.perf_counter()))
+    station = {
+        "coordinator": coordinator,
+        "mb": mb_server,
+        "push": True,
+        "auth": aiohttp.BasicAuth(USERNAME, PASSWORD),
+    }
+
+    app = web.Application()
+    app["hass"] = hass
+    MeteobridgePushView({"bench": station}).register(app, app.router)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}{PUSH_URL.format(station='bench')}"
+
+    simulator = MeteobridgeSimulator()
+    payloads = [simulator.payload(TEMPLATE) for _ in range(PAYLOADS)]
+    latencies = []
+    auth = aiohttp.BasicAuth(USERNAME, PASSWORD)
+    async with aiohttp.ClientSession(auth=auth) as session:
+        start = time.perf_counter()
+        for payload in payloads:
+            sent = time.perf_counter()
+            async with session.post(url, data=payload) as response:
+                await response.read()
+            latencies.append(updated[-1] - sent)
+        elapsed = time.perf_counter() - start
+
+    await runner.cleanup()
+    await hass.async_stop(force=True)
+    return {
+        "payloads_per_s": PAYLOADS / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
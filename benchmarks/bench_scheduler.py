@@ -0,0 +1,83 @@
+"""Benchmark of the shared poll scheduler with a growing number of stations."""
+import asyncio
+from datetime import timedelta
+import logging
+import time
+
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from custom_components.mbweather.const import MAX_CONCURRENT_POLLS
+from custom_components.mbweather.meteobridge import Meteobridge
+from custom_components.mbweather.scheduler import PollScheduler
+from tests.simulator import PASSWORD, USERNAME
+
+from .bench_poll import create_hass
+from .harness import benchmark, percentile, simulator_process
+
+_LOGGER = logging.getLogger(__name__)
+
+STATION_COUNTS = (1, 16, 64)
+INTERVAL = timedelta(seconds=1)
+ROUNDS = 5
+
+
+def _timed(update_method, latencies):
+    """Return update_method appending the duration of each call to latencies."""
+
+    async def _update():
+        start = time.perf_counter()
+        try:
+            return await update_method()
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    return _update
+
+
+async def _run_stations(hass, host: str, count: int) -> list:
+    """Poll count stations from one scheduler for ROUNDS intervals. Returns
+    the latency of every poll, from sending the request to the decoded data,
+    in seconds."""
+    scheduler = PollScheduler(hass, MAX_CONCURRENT_POLLS)
+    latencies = []
+    servers = []
+    for index in range(count):
+        mb_server = Meteobridge(None, host, USERNAME, PASSWORD, "metric")
+        servers.append(mb_server)
+        # Open the kept-alive connection, as after the first refresh
+        await mb_server.update()
+        coordinator = DataUpdateCoordinator(
+            hass,
+            _LOGGER,
+            name=f"station{index}",
+            update_method=scheduler.wrap(_timed(mb_server.update, latencies)),
+            update_interval=INTERVAL * 2,
+        )
+        scheduler.add(coordinator, INTERVAL)
+
+    scheduler.async_start()
+    await asyncio.sleep(INTERVAL.total_seconds() * (ROUNDS + 1))
+    scheduler.async_stop()
+    # Let the refreshes in flight finish
+    await hass.async_block_till_done()
+    for mb_server in servers:
+        await mb_server.close()
+    return latencies
+
+
+@benchmark
+async def bench_scheduler():
+    """p50 and p99 poll latency of 1, 16 and 64 stations polled every
+    second from one scheduler, against a single simulated Logger."""
+    metrics = {}
+    hass = create_hass()
+    async with simulator_process() as host:
+        for count in STATION_COUNTS:
+            latencies = await _run_stations(hass, host, count)
+            metrics[f"n{count}_p50_ms"] = percentile(latencies, 50) * 1000
+            metrics[f"n{count}_p99_ms"] = percentile(latencies, 99) * 1000
+            metrics[f"n{count}_polls_per_s"] = len(latencies) / (
+                INTERVAL.total_seconds() * ROUNDS
+            )
+    await hass.async_stop(force=True)
+    return metrics
@@ -0,0 +1,57 @@
+"""Benchmark of the start of the integration with a slow Logger."""
+import asyncio
+import time
+
+from homeassistant import core
+
+from custom_components.mbweather import CONFIG_SCHEMA, DOMAIN, async_setup
+from tests.simulator import PASSWORD, USERNAME
+
+from .bench_poll import create_hass
+from .harness import benchmark, simulator_process
+
+SLOW_DELAY = 2.0
+SCAN_INTERVAL = 1
+
+
+async def _polled(mb_server, count: int) -> float:
+    """Wait for count polls of mb_server, and return when the last ended."""
+    while mb_server.stats.stages["poll"].count < count:
+        await asyncio.sleep(0.001)
+    return time.perf_counter()
+
+
+@benchmark
+async def bench_startup():
+    """Time from async_setup to the first and second poll of a station,
+    polled every SCAN_INTERVAL, while another station waits SLOW_DELAY
+    seconds for its Logger to answer."""
+    hass = create_hass()
+    hass.state = core.CoreState.running
+    async with simulator_process() as fast, simulator_process(delay=SLOW_DELAY) as slow:
+        config = CONFIG_SCHEMA(
+            {
+                DOMAIN: [
+                    {
+                        "host": host,
+                        "username": USERNAME,
+                        "password": PASSWORD,
+                        "name": name,
+                        "scan_interval": SCAN_INTERVAL,
+                    }
+                    for name, host in (("slow", slow), ("fast", fast))
+                ]
+            }
+        )
+        start = time.perf_counter()
+        await async_setup(hass, config)
+        stations = hass.data[DOMAIN]["stations"]
+        first = await _polled(stations["fast"]["mb"], 1)
+        second = await _polled(stations["fast"]["mb"], 2)
+        slow_first = await _polled(stations["slow"]["mb"], 1)
+        await hass.async_stop(force=True)
+    return {
+        "fast_first_poll_ms": (first - start) * 1000,
+        "fast_second_poll_ms": (second - start) * 1000,
+        "slow_first_poll_ms": (slow_first - start) * 1000,
+    }
@@ -0,0 +1,33 @@
+"""Benchmark of reading the time of a million Logger rows."""
+import time
+
+from custom_components.mbweather.meteobridge import TIME_TAGS
+
+from tests.simulator import MeteobridgeSimulator
+
+from .harness import benchmark
+
+ROWS = 1000000
+
+
+@benchmark
+async def bench_timestamps():
+    """Rows per second whose timestamp and time are read, one row at a time
+    as on a poll, and as a column as in a backfill."""
+    simulator = MeteobridgeSimulator()
+    start = simulator.series.time
+    template = TIME_TAGS.rstrip(";")
+    rows = [
+        simulator.render(template, start + 10 * step).split(";") for step in range(ROWS)
+    ]
+    epochs = [row[0] for row in rows]
+
+    begin = time.perf_counter()
+    for values in rows:
+        (values[1], int(values[0]))
+    polls = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    [int(epoch) for epoch in epochs]
+    column = time.perf_counter() - begin
+    return {"poll_rows_per_s": ROWS / polls, "column_rows_per_s": ROWS / column}
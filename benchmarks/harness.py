@@ -0,0 +1,186 @@
+"""Runs the registered benchmarks and compares them with stored baselines.
+
+A benchmark is an async function returning a dict of metrics. Metrics
+ending in _per_s are better when higher, all others when lower. A metric
+that is worse than its baseline by more than the tolerance, and by more
+than the noise floor of its unit, is a regression. Timings vary a lot
+between runs on shared machines, so their tolerance is wide. Memory use
+hardly varies, and is held to MEMORY_TOLERANCE.
+"""
+import asyncio
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+import gc
+import json
+import multiprocessing
+import platform
+import time
+import tracemalloc
+
+# Registered benchmarks by name
+BENCHMARKS = {}
+
+# Differences below these, by metric suffix, are noise
+NOISE_FLOORS = {
+    "_ms": 0.5,
+    "_us": 2.0,
+    "_kib": 1.0,
+    "_bytes": 16.0,
+}
+MEMORY_SUFFIXES = ("_kib", "_bytes")
+MEMORY_TOLERANCE = 0.1
+
+
+def benchmark(func):
+    """Register an async benchmark function, named without its bench_ prefix."""
+    name = func.__name__
+    if name.startswith("bench_"):
+        name = name[len("bench_") :]
+    BENCHMARKS[name] = func
+    return func
+
+
+async def measure(
+    op, number: int, unit: str = "ops", samples: int = 100, repeat: int = 5
+) -> dict:
+    """Run op, a function or coroutine function, number times, repeat times.
+
+    Returns the best rate of the repeats as <unit>_per_s, the least CPU time
+    per run in µs as cpu_us and, from another samples runs, the peak of the
+    memory allocated during a run in KiB as alloc_kib.
+    """
+    is_async = asyncio.iscoroutinefunction(op)
+
+    elapsed = cpu = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start_cpu = time.process_time()
+        start = time.perf_counter()
+        for _ in range(number):
+            if is_async:
+                await op()
+            else:
+                op()
+        elapsed = min(elapsed, time.perf_counter() - start)
+        cpu = min(cpu, time.process_time() - start_cpu)
+
+    peak = 0
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            if is_async:
+                await op()
+            else:
+                op()
+            peak += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+
+    return {
+        f"{unit}_per_s": number / elapsed,
+        "cpu_us": cpu / number * 1e6,
+        "alloc_kib": peak / samples / 1024,
+    }
+
+
+def percentile(values, percent: float) -> float:
+    """Return the nearest-rank percentile of values."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+@contextlib.asynccontextmanager
+async def simulator_process(**options):
+    """Run a MeteobridgeSimulator with options in a process of its own, so
+    its work does not count towards the CPU time and memory measured.
+    Yields the host to poll."""
+    context = multiprocessing.get_context("spawn")
+    connection, child = context.Pipe()
+    process = context.Process(target=_serve, args=(child, options), daemon=True)
+    process.start()
+    loop = asyncio.get_event_loop()
+    # A thread of its own, as Home Assistant shuts down the default executor
+    executor = ThreadPoolExecutor(1)
+    try:
+        port = await loop.run_in_executor(executor, connection.recv)
+        yield f"127.0.0.1:{port}"
+    finally:
+        connection.send(None)
+        await loop.run_in_executor(executor, process.join, 5)
+        executor.shutdown()
+        if process.is_alive():
+            process.kill()
+
+
+def _serve(connection, options) -> None:
+    """Serve a simulator until told to stop through connection."""
+    from tests.simulator import MeteobridgeSimulator
+
+    async def _run():
+        simulator = MeteobridgeSimulator(**options)
+        await simulator.start()
+        connection.send(simulator.port)
+        await asyncio.get_event_loop().run_in_executor(None, connection.recv)
+        await simulator.close()
+
+    asyncio.run(_run())
+
+
+def load_baselines(path: str) -> dict:
+    try:
+        with open(path) as baselines:
+            return json.load(baselines)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(path: str, baselines: dict) -> None:
+    baselines["_meta"] = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+    with open(path, "w") as output:
+        json.dump(baselines, output, indent=2, sort_keys=True)
+        output.write("\n")
+
+
+def regressions(name: str, metrics: dict, baseline: dict, tolerance: float) -> list:
+    """Return a message for every metric worse than its baseline."""
+    messages = []
+    for metric, value in metrics.items():
+        expected = baseline.get(metric)
+        if expected is None:
+            continue
+        floor = 0.0
+        for suffix, noise in NOISE_FLOORS.items():
+            if metric.endswith(suffix):
+                floor = noise
+        if metric.endswith("_per_s"):
+            worse = expected - value
+        else:
+            worse = value - expected
+        limit = MEMORY_TOLERANCE if metric.endswith(MEMORY_SUFFIXES) else tolerance
+        if worse > abs(expected) * limit and worse > floor:
+            messages.append(
+                f"{name}.{metric}: {value:.4g} against a baseline of {expected:.4g}"
+            )
+    return messages
+
+
+async def run(names, baselines: dict, tolerance: float):
+    """Run the benchmarks in names. Returns their metrics by name and the
+    regressions found."""
+    results = {}
+    failures = []
+    for name in names:
+        metrics = await BENCHMARKS[name]()
+        results[name] = metrics
+        baseline = baselines.get(name, {})
+        for metric, value in metrics.items():
+            expected = baseline.get(metric)
+            change = "" if not expected else f"{(value / expected - 1) * 100:+.1f}%"
+            print(f"{name:<28} {metric:<28} {value:>14.4g} {change:>9}", flush=True)
+        failures.extend(regressions(name, metrics, baseline, tolerance))
+    return results, failures
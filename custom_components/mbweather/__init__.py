@@ -1,6 +1,9 @@
 """Meteobridge Weather Integration for Home Assistant"""
+import asyncio
 import logging
-from datetime import timedelta, datetime
+import time
+from datetime import timedelta
+import aiohttp
 import voluptuous as vol
 
 from homeassistant.const import (
@@ -10,29 +13,41 @@ from homeassistant.const import (
     CONF_USERNAME,
     CONF_PASSWORD,
     CONF_SCAN_INTERVAL,
+    EVENT_HOMEASSISTANT_STOP,
     PRECISION_TENTHS,
     PRECISION_WHOLE,
 )
 from homeassistant.helpers import config_validation as cv
 from homeassistant import core
-from homeassistant.helpers import discovery
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.temperature import display_temp as show_temp
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.event import async_track_time_interval
-from homeassistant.helpers.dispatcher import (
-    async_dispatcher_connect,
-    async_dispatcher_send,
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.setup import async_setup_component
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
 )
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from homeassistant.helpers import update_coordinator
 
 from . import meteobridge as mb
+from .aggregates import MAX_WINDOW
 from .const import (
     DOMAIN,
-    DEFAULT_ATTRIBUTION,
+    CONF_BACKFILL,
+    CONF_CONNECT_TIMEOUT,
+    CONF_DECODE_WORKERS,
+    CONF_EXPORT,
+    CONF_EXPORT_FILE,
+    CONF_EXPORT_SOCKET,
+    CONF_HISTORY_DAYS,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_PUSH,
+    CONF_READ_TIMEOUT,
+    CONF_STATION,
     CONF_USE_SLL,
+    MAX_CONCURRENT_POLLS,
 )
+from .scheduler import PollScheduler, activity_thresholds
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -57,25 +72,64 @@ ATTR_WEATHER_RAINTODAY = "rain_today"
 ATTR_WEATHER_RAINRATE = "rain_rate"
 ATTR_WEATHER_PRECIP_PPROBABILIY = "precip_probability"
 
+SERVICE_DUMP_STATS = "dump_stats"
+
 MBDATA = DOMAIN
 
 DEFAULT_SCAN_INTERVAL = timedelta(seconds=10)
+FIRST_REFRESH_TIMEOUT = 30
+
+EXPORT_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Exclusive(CONF_EXPORT_FILE, CONF_EXPORT): cv.string,
+            vol.Exclusive(CONF_EXPORT_SOCKET, CONF_EXPORT): cv.string,
+        }
+    ),
+    cv.has_at_least_one_key(CONF_EXPORT_FILE, CONF_EXPORT_SOCKET),
+)
 
-CONFIG_SCHEMA = vol.Schema(
+STATION_SCHEMA = vol.Schema(
     {
-        DOMAIN: vol.Schema(
-            {
-                vol.Required(CONF_HOST): cv.string,
-                vol.Required(CONF_USERNAME): cv.string,
-                vol.Required(CONF_PASSWORD): cv.string,
-                vol.Optional(
-                    CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL
-                ): cv.time_period,
-                vol.Optional(CONF_USE_SLL, default=False): cv.string,
-                vol.Optional(CONF_NAME, default=DOMAIN): cv.string,
-            }
-        ),
-    },
+        vol.Required(CONF_HOST): cv.string,
+        vol.Required(CONF_USERNAME): cv.string,
+        vol.Required(CONF_PASSWORD): cv.string,
+        vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): cv.time_period,
+        vol.Optional(CONF_MAX_SCAN_INTERVAL): cv.time_period,
+        vol.Optional(CONF_USE_SLL, default=False): cv.string,
+        vol.Optional(CONF_NAME, default=DOMAIN): cv.string,
+        vol.Optional(CONF_HISTORY_DAYS, default=0): cv.positive_int,
+        vol.Optional(CONF_BACKFILL, default=False): cv.boolean,
+        vol.Optional(CONF_PUSH, default=False): cv.boolean,
+        vol.Optional(
+            CONF_CONNECT_TIMEOUT, default=timedelta(seconds=mb.CONNECT_TIMEOUT)
+        ): cv.time_period,
+        vol.Optional(
+            CONF_READ_TIMEOUT, default=timedelta(seconds=mb.READ_TIMEOUT)
+        ): cv.time_period,
+        vol.Optional(CONF_EXPORT): EXPORT_SCHEMA,
+        vol.Optional(CONF_DECODE_WORKERS, default=0): cv.positive_int,
+    }
+)
+
+
+def _has_unique_names(stations: list) -> list:
+    """Validate that no two stations share a name, as each is stored and
+    found by its name. Stations without a name all get the default one."""
+    names = set()
+    for station in stations:
+        name = station[CONF_NAME]
+        if name in names:
+            raise vol.Invalid(
+                f"Station name {name} is used more than once, "
+                f"give every station a {CONF_NAME} of its own"
+            )
+        names.add(name)
+    return stations
+
+
+CONFIG_SCHEMA = vol.Schema(
+    {DOMAIN: vol.All(cv.ensure_list, [STATION_SCHEMA], _has_unique_names)},
     extra=vol.ALLOW_EXTRA,
 )
 
@@ -83,42 +137,361 @@ CONFIG_SCHEMA = vol.Schema(
 async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
     """Set up the MBWeather platform."""
 
-    conf = config[DOMAIN]
-    host = conf[CONF_HOST]
-    username = conf[CONF_USERNAME]
-    password = conf[CONF_PASSWORD]
-    name = conf[CONF_NAME]
-    ssl = conf[CONF_USE_SLL]
+    # Pushed data is received by the http component, only set up if needed
+    push = any(conf[CONF_PUSH] for conf in config[DOMAIN])
+    if push and not await async_setup_component(hass, "http", config):
+        _LOGGER.error("Cannot receive pushed Meteobridge data without http")
+        return False
+
     unit_system = "metric" if hass.config.units.is_metric else "imperial"
-    scan_interval = conf[CONF_SCAN_INTERVAL]
-    session = async_get_clientsession(hass)
+    scheduler = PollScheduler(hass, MAX_CONCURRENT_POLLS)
+    stations = {}
+
+    # Large batches, as from a backfill, are decoded in worker processes
+    # if set, else in the default thread pool. Backfills are rare, so all
+    # stations share one pool, as large as the largest asked for.
+    executor = None
+    workers = max(conf[CONF_DECODE_WORKERS] for conf in config[DOMAIN])
+    if workers:
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(workers)
+
+    for conf in config[DOMAIN]:
+        host = conf[CONF_HOST]
+        username = conf[CONF_USERNAME]
+        password = conf[CONF_PASSWORD]
+        name = conf[CONF_NAME]
+        ssl = conf[CONF_USE_SLL]
+        scan_interval = conf[CONF_SCAN_INTERVAL]
+        max_scan_interval = max(
+            conf.get(CONF_MAX_SCAN_INTERVAL, scan_interval), scan_interval
+        )
 
-    mb_server = mb.Meteobridge(session, host, username, password, unit_system, ssl)
-    _LOGGER.debug("Connected to Meteobridge Platform")
+        # Meteobridge keeps its own kept-alive connection to the Logger
+        mb_server = mb.Meteobridge(
+            None,
+            host,
+            username,
+            password,
+            unit_system,
+            ssl,
+            conf[CONF_CONNECT_TIMEOUT].total_seconds(),
+            conf[CONF_READ_TIMEOUT].total_seconds(),
+            executor if conf[CONF_DECODE_WORKERS] else None,
+            push_only=conf[CONF_PUSH],
+        )
+        _LOGGER.debug("Connected to Meteobridge Platform %s", name)
 
-    hass.data[CONF_NAME] = name
+        history = None
+        update_method = _checked_update(mb_server.update)
+        if conf[CONF_HISTORY_DAYS]:
+            # pylint: disable=import-outside-toplevel
+            from .history import HistoryStore
 
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name=DOMAIN,
-        update_method=mb_server.update,
-        update_interval=scan_interval,
-    )
+            history = HistoryStore(
+                hass.config.path(STORAGE_DIR, DOMAIN, name), mb.NUMERIC_KEYS
+            )
+            update_method = _recorded_update(
+                hass, name, update_method, mb_server, history, conf[CONF_BACKFILL]
+            )
+            _async_track_compaction(hass, history, conf[CONF_HISTORY_DAYS])
+            if conf[CONF_BACKFILL]:
+                _LOGGER.info(
+                    "Backfilling %s is experimental, it relies on parameters "
+                    "of template.cgi that Meteobridge does not document",
+                    name,
+                )
+
+        exporter = None
+        if CONF_EXPORT in conf:
+            # pylint: disable=import-outside-toplevel
+            from .export import Exporter, FileSink, SocketSink
+
+            export = conf[CONF_EXPORT]
+            if CONF_EXPORT_FILE in export:
+                sink = FileSink(hass.config.path(export[CONF_EXPORT_FILE]))
+            else:
+                sink = SocketSink(export[CONF_EXPORT_SOCKET])
+            exporter = Exporter(sink)
+            exporter.start()
+            update_method = _exported_update(name, update_method, exporter)
+
+        # The scheduler refreshes the coordinator on its own staggered slot,
+        # or pushed data does. The coordinator interval is only a fallback
+        # should that stall. With push it never polls, but marks the station
+        # unavailable when nothing was pushed.
+        coordinator = DataUpdateCoordinator(
+            hass,
+            _LOGGER,
+            name=name,
+            update_method=scheduler.wrap(update_method),
+            update_interval=max_scan_interval * 2,
+        )
+        if not conf[CONF_PUSH]:
+            scheduler.add(
+                coordinator,
+                scan_interval,
+                max_scan_interval,
+                mb_server.stats,
+                activity_thresholds(unit_system),
+            )
+        stations[name] = {
+            "coordinator": coordinator,
+            "mb": mb_server,
+            "history": history,
+            "exporter": exporter,
+            "push": conf[CONF_PUSH],
+            "auth": aiohttp.BasicAuth(username, password),
+        }
+
+    async def async_start(conf):
+        """Fetch the first data of a station, then start polling it. Runs in
+        the background for each station, so a slow Logger holds up neither
+        the start of Home Assistant nor the other stations. The entities are
+        unavailable until their station has data."""
+        station = stations[conf[CONF_NAME]]
+        history = station["history"]
+        backfill = history is not None and conf[CONF_BACKFILL]
+        if history is not None:
+            await _async_restore_aggregates(hass, station)
+        # Read before the first refresh, which records a new last row
+        if backfill:
+            last = await hass.async_add_executor_job(history.last_timestamp)
+        if not station["push"]:
+            await _async_first_refresh(station["coordinator"])
+            scheduler.async_start(station["coordinator"])
+
+        # Backfill the history missed while Home Assistant was not running
+        if not backfill:
+            return
+        # Compared in the time of the Logger, as the history is stamped
+        observation = station["mb"].observation
+        now = time.time() if observation is None else observation["timestamp"]
+        interval = conf[CONF_SCAN_INTERVAL].total_seconds()
+        if last is None or now - last < 2 * interval:
+            return
+        start = max(last, now - conf[CONF_HISTORY_DAYS] * 86400)
+        hass.async_create_task(
+            _async_backfill(hass, conf[CONF_NAME], station["mb"], history, start, now)
+        )
+
+    start_tasks = [hass.async_create_task(async_start(conf)) for conf in config[DOMAIN]]
+
+    async def async_stop(event):
+        """Stop polling and close the connections to the Loggers."""
+        for task in start_tasks:
+            task.cancel()
+        scheduler.async_stop()
+        for station in stations.values():
+            await station["mb"].close()
+            if station["exporter"] is not None:
+                await station["exporter"].close()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_stop)
+
+    if push:
+        # pylint: disable=import-outside-toplevel
+        from .push import PUSH_URL, MeteobridgePushView
+
+        hass.http.register_view(MeteobridgePushView(stations))
+        for name, station in stations.items():
+            if station["push"]:
+                _LOGGER.info(
+                    "Send Meteobridge data to %s?data=%s",
+                    PUSH_URL.format(station=name),
+                    mb.TEMPLATE,
+                )
+
+    async def async_dump_stats(call):
+        """Log the poll statistics of every station."""
+        for name, station in stations.items():
+            _LOGGER.info(
+                "Poll statistics of %s: %s", name, station["mb"].stats.as_dict()
+            )
+            if station["mb"].invalid:
+                _LOGGER.info(
+                    "Sensors of %s without a valid value: %s",
+                    name,
+                    _describe_invalid(station["mb"]),
+                )
+            if station["exporter"] is not None:
+                _LOGGER.info(
+                    "Records of %s dropped by the exporter: %d",
+                    name,
+                    station["exporter"].dropped,
+                )
+
+    hass.services.async_register(DOMAIN, SERVICE_DUMP_STATS, async_dump_stats)
 
-    # Fetch initial data so we have data when entities subscribe
-    await coordinator.async_refresh()
+    # The first station is kept as the default for platforms without a station
+    first = config[DOMAIN][0][CONF_NAME]
+    hass.data[CONF_NAME] = first
     hass.data[MBDATA] = {
-        "coordinator": coordinator,
-        "mb": mb_server,
+        **stations[first],
+        "stations": stations,
+        "scheduler": scheduler,
     }
 
     return True
 
 
+async def _async_restore_aggregates(hass, station):
+    """Fill the rolling aggregates of a station from its history, so they
+    do not start out empty after a restart."""
+    columns = await hass.async_add_executor_job(station["history"].window, MAX_WINDOW)
+    station["mb"].restore_aggregates(columns)
+    _LOGGER.debug(
+        "Restored aggregates of %s from %d records",
+        station["coordinator"].name,
+        len(columns["time"]),
+    )
+
+
+async def _async_first_refresh(coordinator):
+    """Refresh coordinator, giving up after FIRST_REFRESH_TIMEOUT. The
+    scheduler tries again on the next slot."""
+    try:
+        await asyncio.wait_for(coordinator.async_refresh(), FIRST_REFRESH_TIMEOUT)
+    except asyncio.TimeoutError:
+        _LOGGER.warning(
+            "No data from %s within %s seconds, trying again later",
+            coordinator.name,
+            FIRST_REFRESH_TIMEOUT,
+        )
+
+
+def _checked_update(update_method):
+    """Return update_method raising UpdateFailed for an unreachable Logger,
+    so the coordinator logs an outage once instead of on every poll."""
+
+    async def _update():
+        try:
+            return await update_method()
+        except mb.UnexpectedError as err:
+            raise UpdateFailed(str(err)) from err
+
+    return _update
+
+
+def _recorded_update(hass, name, update_method, mb_server, history, backfill):
+    """Return update_method also appending each new Observation to history,
+    stamped with its Logger time. With backfill, the history missed during
+    an outage of the Logger is fetched from it."""
+    last = None
+
+    async def _update():
+        nonlocal last
+        data = await update_method()
+        # A Logger that did not measure anew sends the same time again
+        timestamp = data["timestamp"]
+        if last is None or timestamp > last:
+            last = timestamp
+            record = history.record(timestamp, data)
+            hass.async_add_executor_job(history.write, record)
+        gap = mb_server.pop_gap()
+        if backfill and gap is not None:
+            hass.async_create_task(
+                _async_backfill(hass, name, mb_server, history, *gap)
+            )
+        return data
+
+    return _update
+
+
+def _describe_invalid(mb_server) -> str:
+    """Return the keys without a valid value, each with its last valid
+    value and how long ago it was sent."""
+    described = []
+    for key in sorted(mb_server.invalid):
+        age = mb_server.age(key)
+        if age is None:
+            described.append(f"{key} (never valid)")
+        else:
+            value = mb_server.last_valid[key][0]
+            described.append(f"{key} (last {value}, {age:.0f} s ago)")
+    return ", ".join(described)
+
+
+def _exported_update(name, update_method, exporter):
+    """Return update_method also queueing each poll for export."""
+
+    async def _update():
+        data = await update_method()
+        exporter.add({"station": name, **data})
+        return data
+
+    return _update
+
+
+async def _async_backfill(hass, name, mb_server, history, start, end):
+    """Fill a gap in history with the rows recorded by the Logger."""
+    _LOGGER.debug("Backfilling %s from %s to %s", name, start, end)
+    try:
+        content = await mb_server.fetch_history(start, end)
+    except (aiohttp.ClientError, asyncio.TimeoutError, mb.UnexpectedError) as error:
+        _LOGGER.warning("Could not backfill history of %s: %s", name, error)
+        return
+
+    timestamps, columns = await mb_server.decode_batch([content])
+    if len(timestamps) <= 1:
+        _LOGGER.warning(
+            "Meteobridge %s sent %d rows of history, so it does not seem to "
+            "support history queries. Set %s to false to stop backfilling",
+            name,
+            len(timestamps),
+            CONF_BACKFILL,
+        )
+    count = await hass.async_add_executor_job(
+        _store_history, history, timestamps, columns, start, end
+    )
+    _LOGGER.debug("Backfilled %s rows for %s", count, name)
+
+
+def _store_history(history, timestamps, columns, start, end):
+    """Merge the decoded history rows within the gap. Does file I/O."""
+    records = [
+        record
+        for record in history.records(timestamps, columns)
+        if start < record[0] < end
+    ]
+    history.insert(records)
+    return len(records)
+
+
+@core.callback
+def _async_track_compaction(hass, history, keep_days):
+    """Remove expired history once an hour."""
+
+    @core.callback
+    def _async_compact(now):
+        hass.async_add_executor_job(history.compact, keep_days)
+
+    async_track_time_interval(hass, _async_compact, timedelta(hours=1))
+
+
+def get_station(hass: core.HomeAssistant, config: dict):
+    """Return the data of the station a platform is configured for."""
+    station = config.get(CONF_STATION)
+    if station is None:
+        return hass.data[MBDATA]
+    if station not in hass.data[MBDATA]["stations"]:
+        _LOGGER.error("Meteobridge station %s is not configured", station)
+        return None
+    return hass.data[MBDATA]["stations"][station]
+
+
 class WeatherEntityExt(Entity):
     """ABC for weather data. Extended with extra Attributes"""
 
+    # Forecast with display temperatures, and what it was built from
+    _forecast_source = None
+    _forecast_key = None
+    _forecast_display = None
+
     @property
     def temperature(self):
         """Return the platform temperature."""
@@ -242,29 +615,36 @@ class WeatherEntityExt(Entity):
         if attribution is not None:
             data[ATTR_WEATHER_ATTRIBUTION] = attribution
 
-        if self.forecast is not None:
-            forecast = []
-            for forecast_entry in self.forecast:
-                forecast_entry = dict(forecast_entry)
-                forecast_entry[ATTR_FORECAST_TEMP] = show_temp(
-                    self.hass,
-                    forecast_entry[ATTR_FORECAST_TEMP],
-                    self.temperature_unit,
-                    self.precision,
-                )
-                if ATTR_FORECAST_TEMP_LOW in forecast_entry:
-                    forecast_entry[ATTR_FORECAST_TEMP_LOW] = show_temp(
-                        self.hass,
-                        forecast_entry[ATTR_FORECAST_TEMP_LOW],
-                        self.temperature_unit,
-                        self.precision,
-                    )
-                forecast.append(forecast_entry)
-
-            data[ATTR_FORECAST] = forecast
+        forecast = self.forecast
+        if forecast is not None:
+            data[ATTR_FORECAST] = self._display_forecast(forecast)
 
         return data
 
+    def _display_forecast(self, source):
+        """Return the forecast with display temperatures.
+        The result is reused for as long as the same forecast list is given."""
+        key = (self.temperature_unit, self.precision)
+        if source is self._forecast_source and key == self._forecast_key:
+            return self._forecast_display
+
+        forecast = []
+        for forecast_entry in source:
+            forecast_entry = dict(forecast_entry)
+            forecast_entry[ATTR_FORECAST_TEMP] = show_temp(
+                self.hass, forecast_entry[ATTR_FORECAST_TEMP], *key
+            )
+            if ATTR_FORECAST_TEMP_LOW in forecast_entry:
+                forecast_entry[ATTR_FORECAST_TEMP_LOW] = show_temp(
+                    self.hass, forecast_entry[ATTR_FORECAST_TEMP_LOW], *key
+                )
+            forecast.append(forecast_entry)
+
+        self._forecast_source = source
+        self._forecast_key = key
+        self._forecast_display = forecast
+        return forecast
+
     @property
     def state(self):
         """Return the current state."""
@@ -0,0 +1,110 @@
+"""Rolling window aggregates over the polled Meteobridge values.
+   Every window is updated in amortized O(1) per sample, using monotonic
+   deques for min and max and running sums for averages.
+"""
+
+from collections import deque
+
+# (sensor_data key, source key, aggregate, window in seconds, digits)
+AGGREGATES = (
+    ("windgust_max_10m", "windgust", "max", 600, 1),
+    ("windspeed_avg_10m", "windspeed", "avg", 600, 1),
+    ("temp_min_1h", "temperature", "min", 3600, 1),
+    ("temp_max_1h", "temperature", "max", 3600, 1),
+    ("pressure_trend_1h", "pressure", "trend", 3600, 3),
+    ("temp_trend_3h", "temperature", "trend", 10800, 1),
+)
+# Longest window, the seconds of samples needed to fill every aggregate
+MAX_WINDOW = max(window for _, _, _, window, _ in AGGREGATES)
+
+
+class RollingMax:
+    """Maximum of the samples within a time window."""
+
+    def __init__(self, window: float):
+        self._window = window
+        self._samples = deque()
+
+    def add(self, timestamp: float, value: float) -> float:
+        samples = self._samples
+        while samples and samples[-1][1] <= value:
+            samples.pop()
+        samples.append((timestamp, value))
+        cutoff = timestamp - self._window
+        while samples[0][0] <= cutoff:
+            samples.popleft()
+        return samples[0][1]
+
+
+class RollingMin(RollingMax):
+    """Minimum of the samples within a time window."""
+
+    def add(self, timestamp: float, value: float) -> float:
+        return -super().add(timestamp, -value)
+
+
+class RollingAvg:
+    """Average of the samples within a time window."""
+
+    def __init__(self, window: float):
+        self._window = window
+        self._samples = deque()
+        self._sum = 0.0
+
+    def add(self, timestamp: float, value: float) -> float:
+        samples = self._samples
+        samples.append((timestamp, value))
+        self._sum += value
+        cutoff = timestamp - self._window
+        while samples[0][0] <= cutoff:
+            self._sum -= samples.popleft()[1]
+        return self._sum / len(samples)
+
+
+class RollingTrend:
+    """Change from the oldest to the newest sample within a time window."""
+
+    def __init__(self, window: float):
+        self._window = window
+        self._samples = deque()
+
+    def add(self, timestamp: float, value: float) -> float:
+        samples = self._samples
+        samples.append((timestamp, value))
+        cutoff = timestamp - self._window
+        while samples[0][0] <= cutoff:
+            samples.popleft()
+        return value - samples[0][1]
+
+
+WINDOWS = {
+    "max": RollingMax,
+    "min": RollingMin,
+    "avg": RollingAvg,
+    "trend": RollingTrend,
+}
+
+
+class RollingAggregates:
+    """Maintains every aggregate of AGGREGATES from a stream of samples."""
+
+    def __init__(self, aggregates=AGGREGATES):
+        self._aggregates = tuple(
+            (key, source, WINDOWS[aggregate](window), digits)
+            for key, source, aggregate, window, digits in aggregates
+        )
+        self.sources = tuple(dict.fromkeys(source for _, source, _, _, _ in aggregates))
+        self._last = {}
+
+    def add(self, timestamp: float, data: dict) -> dict:
+        """Add a sample and return the current value of every aggregate.
+        A missing source value is skipped, keeping the previous value."""
+        result = {}
+        for key, source, window, digits in self._aggregates:
+            value = data.get(source)
+            if value is None:
+                result[key] = self._last.get(key)
+                continue
+            result[key] = round(window.add(timestamp, value), digits)
+        self._last = result
+        return result
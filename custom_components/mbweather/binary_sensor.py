@@ -8,7 +8,6 @@
     Author: Bjarne Riis
 """
 import logging
-from datetime import timedelta
 
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
@@ -17,13 +16,15 @@ from homeassistant.components.binary_sensor import (
     BinarySensorDevice,
 )
 from homeassistant.const import ATTR_ATTRIBUTION, CONF_MONITORED_CONDITIONS, CONF_NAME
+from homeassistant.core import callback
 from homeassistant.util import slugify
-from . import MBDATA
+from . import get_station
 from .const import (
     DOMAIN,
     DEFAULT_ATTRIBUTION,
     ENTITY_ID_BINARY_SENSOR_FORMAT,
     ENTITY_UNIQUE_ID,
+    CONF_STATION,
 )
 
 DEPENDENCIES = ["mbweather"]
@@ -42,21 +43,27 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
             cv.ensure_list, [vol.In(SENSOR_TYPES)]
         ),
         vol.Optional(CONF_NAME, default=DOMAIN): cv.string,
+        vol.Optional(CONF_STATION): cv.string,
     }
 )
 
 
 async def async_setup_platform(hass, config, async_add_entities, _discovery_info=None):
     """Set up the MBWeather binary sensor platform."""
-    coordinator = hass.data[MBDATA]["coordinator"]
-    if not coordinator.data:
+    station = get_station(hass, config)
+    if station is None:
         return
+    coordinator = station["coordinator"]
+    mb_server = station["mb"]
 
     name = slugify(config.get(CONF_NAME))
+    prefix = config.get(CONF_STATION)
 
     sensors = []
     for sensor in config[CONF_MONITORED_CONDITIONS]:
-        sensors.append(MBweatherBinarySensor(coordinator, sensor, name))
+        sensors.append(
+            MBweatherBinarySensor(coordinator, mb_server, sensor, name, prefix)
+        )
         _LOGGER.debug("Binary ensor added: %s", sensor)
 
     async_add_entities(sensors, True)
@@ -65,20 +72,32 @@ async def async_setup_platform(hass, config, async_add_entities, _discovery_info
 class MBweatherBinarySensor(BinarySensorDevice):
     """ Implementation of a MBWeather Binary Sensor. """
 
-    def __init__(self, coordinator, sensor, name):
+    def __init__(self, coordinator, mb_server, sensor, name, prefix=None):
         """Initialize the sensor."""
         self.coordinator = coordinator
+        self._mb = mb_server
         self._sensor = sensor
         self._device_class = SENSOR_TYPES[self._sensor][1]
-        self.entity_id = ENTITY_ID_BINARY_SENSOR_FORMAT.format(self._sensor)
         self._name = SENSOR_TYPES[self._sensor][0]
-        self._unique_id = ENTITY_UNIQUE_ID.format(slugify(self._name).replace(" ", "_"))
+        object_id = self._sensor
+        unique_id = slugify(self._name).replace(" ", "_")
+        if prefix is not None:
+            object_id = f"{slugify(prefix)}_{object_id}"
+            unique_id = f"{slugify(prefix)}_{unique_id}"
+        self.entity_id = ENTITY_ID_BINARY_SENSOR_FORMAT.format(object_id)
+        self._unique_id = ENTITY_UNIQUE_ID.format(unique_id)
+        self._available = False
 
     @property
     def unique_id(self):
         """Return a unique ID."""
         return self._unique_id
 
+    @property
+    def should_poll(self):
+        """Return False, updates are pushed by the coordinator."""
+        return False
+
     @property
     def name(self):
         """Return the name of the sensor."""
@@ -87,14 +106,14 @@ class MBweatherBinarySensor(BinarySensorDevice):
     @property
     def is_on(self):
         """Return the state of the sensor."""
-        return self.coordinator.data[self._sensor] is True
+        return self._mb.sensor_data.get(self._sensor) is True
 
     @property
     def icon(self):
         """Icon to use in the frontend."""
         return (
             SENSOR_TYPES[self._sensor][2]
-            if self.coordinator.data[self._sensor]
+            if self._mb.sensor_data.get(self._sensor)
             else SENSOR_TYPES[self._sensor][3]
         )
 
@@ -110,10 +129,29 @@ class MBweatherBinarySensor(BinarySensorDevice):
         attr[ATTR_ATTRIBUTION] = DEFAULT_ATTRIBUTION
         return attr
 
+    @property
+    def available(self):
+        """Return False until the first data, while the Logger cannot be
+        reached, and while it sends no valid value for this sensor."""
+        return (
+            self._mb.last_update is not None
+            and self.coordinator.last_update_success
+            and self._sensor not in self._mb.invalid
+        )
+
+    @callback
+    def _async_update_state(self):
+        """Write the state if the value or availability of this sensor
+        changed."""
+        available = self.available
+        if self._sensor in self._mb.changed or available != self._available:
+            self._available = available
+            self.async_write_ha_state()
+
     async def async_added_to_hass(self):
         """When entity is added to hass."""
-        self.coordinator.async_add_listener(self.async_write_ha_state)
+        self.coordinator.async_add_listener(self._async_update_state)
 
     async def async_will_remove_from_hass(self):
         """When entity will be removed from hass."""
-        self.coordinator.async_remove_listener(self.async_write_ha_state)
+        self.coordinator.async_remove_listener(self._async_update_state)
@@ -0,0 +1,62 @@
+"""Circuit breaker for requests to a Meteobridge Logger."""
+import random
+import time
+
+
+class CircuitBreaker:
+    """Stops requests to a Logger that keeps failing.
+
+    After threshold failures in a row the circuit opens, and requests are
+    refused until the retry time. Then a single probe is let through. On
+    success the circuit closes, on failure it opens again for twice as long,
+    up to maximum seconds. Delays are jittered, so Loggers that went down
+    together do not retry in step.
+    """
+
+    def __init__(
+        self,
+        threshold: int = 3,
+        base: float = 10.0,
+        maximum: float = 300.0,
+        jitter: float = 0.2,
+    ):
+        self.failures = 0
+        self._threshold = threshold
+        self._base = base
+        self._maximum = maximum
+        self._jitter = jitter
+        # Monotonic time of the next probe, None while closed
+        self._retry_at = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._retry_at is not None
+
+    def allow(self) -> bool:
+        """Return True if a request may be made now."""
+        return self._retry_at is None or time.monotonic() >= self._retry_at
+
+    def retry_in(self) -> float:
+        """Return the seconds until the next probe, 0 while closed."""
+        if self._retry_at is None:
+            return 0.0
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def failure(self):
+        """Count a failed request. Return the seconds the circuit is open
+        for, or None if it stays closed."""
+        self.failures += 1
+        if self.failures < self._threshold:
+            return None
+        doublings = min(self.failures - self._threshold, 16)
+        delay = min(self._maximum, self._base * 2 ** doublings)
+        delay *= 1 + random.uniform(-self._jitter, self._jitter)
+        self._retry_at = time.monotonic() + delay
+        return delay
+
+    def success(self) -> bool:
+        """Count a successful request. Return True if it closed the circuit."""
+        was_open = self._retry_at is not None
+        self.failures = 0
+        self._retry_at = None
+        return was_open
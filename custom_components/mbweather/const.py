@@ -1,23 +1,34 @@
 """Constants in mbweather component."""
 import logging
 
-from homeassistant.components.weather import DOMAIN as WEATHER_DOMAIN
-from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
-from homeassistant.components.binary_sensor import DOMAIN as BINARY_SENSOR_DOMAIN
-
 DOMAIN = "mbweather"
 
-ENTITY_ID_SENSOR_FORMAT = SENSOR_DOMAIN + ".mbw_{}"
-ENTITY_ID_BINARY_SENSOR_FORMAT = BINARY_SENSOR_DOMAIN + ".mbw_{}"
-ENTITY_ID_WEATHER_FORMAT = WEATHER_DOMAIN + ".mbw_{}"
+# Plain strings, so importing the constants does not load the entity
+# components of Home Assistant
+ENTITY_ID_SENSOR_FORMAT = "sensor.mbw_{}"
+ENTITY_ID_BINARY_SENSOR_FORMAT = "binary_sensor.mbw_{}"
+ENTITY_ID_WEATHER_FORMAT = "weather.mbw_{}"
 
 ENTITY_UNIQUE_ID = "mbw_{}"
 
 CONF_USE_SLL = "use_ssl"
 CONF_WIND_UNIT = "wind_unit"
+CONF_STATION = "station"
+CONF_HISTORY_DAYS = "history_days"
+CONF_BACKFILL = "backfill"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+CONF_PUSH = "push"
+CONF_CONNECT_TIMEOUT = "connect_timeout"
+CONF_READ_TIMEOUT = "read_timeout"
+CONF_DECODE_WORKERS = "decode_workers"
+CONF_EXPORT = "export"
+CONF_EXPORT_FILE = "file"
+CONF_EXPORT_SOCKET = "socket"
 
 ATTR_UPDATED = "updated"
 
+MAX_CONCURRENT_POLLS = 4
+
 DEFAULT_ATTRIBUTION = "Weather data delivered by a Meteobridge powered Weather Station"
 
 LOGGER = logging.getLogger(__package__)
@@ -0,0 +1,153 @@
+"""Meteorological quantities derived from the polled Meteobridge values.
+   Every function takes metric values, as delivered by the Logger:
+   temperatures in °C, relative humidity in %, pressure in hPa and wind
+   speed in m/s. derive works on one poll and derive_columns on columns
+   of many, through the same code, so both give the same results.
+"""
+
+import math
+from bisect import bisect_right
+
+# Upper wind speeds in m/s of Beaufort force 0 to 11
+BEAUFORT_LIMITS = (0.5, 1.6, 3.4, 5.5, 8.0, 10.8, 13.9, 17.2, 20.8, 24.5, 28.5, 32.7)
+
+# Specific gas constants in J/(kg K) of dry air and water vapour
+R_DRY = 287.058
+R_VAPOUR = 461.495
+
+
+def saturation_vapour_pressure(temp: float) -> float:
+    """Saturation vapour pressure in hPa, by the Magnus formula."""
+    return 6.112 * math.exp(17.62 * temp / (243.12 + temp))
+
+
+def vapour_pressure(temp: float, humidity: float) -> float:
+    """Vapour pressure in hPa."""
+    return saturation_vapour_pressure(temp) * humidity / 100
+
+
+def absolute_humidity(temp: float, humidity: float) -> float:
+    """Mass of water vapour in g/m³."""
+    return vapour_pressure(temp, humidity) * 1e5 / (R_VAPOUR * (temp + 273.15))
+
+
+def wet_bulb(temp: float, humidity: float) -> float:
+    """Wet-bulb temperature in °C, by the approximation of Stull (2011)."""
+    return (
+        temp * math.atan(0.151977 * math.sqrt(humidity + 8.313659))
+        + math.atan(temp + humidity)
+        - math.atan(humidity - 1.676331)
+        + 0.00391838 * humidity ** 1.5 * math.atan(0.023101 * humidity)
+        - 4.686035
+    )
+
+
+def cloud_base(temp: float, dewpoint: float) -> float:
+    """Height in m of the base of cumulus clouds above the station."""
+    return max(0.0, (temp - dewpoint) * 125)
+
+
+def air_density(temp: float, humidity: float, pressure: float) -> float:
+    """Density in kg/m³ of moist air. Uses the sea level pressure of the
+    Logger, so it is the density at sea level for stations up high."""
+    vapour = vapour_pressure(temp, humidity)
+    kelvin = temp + 273.15
+    return ((pressure - vapour) / (R_DRY * kelvin) + vapour / (R_VAPOUR * kelvin)) * 100
+
+
+def vapour_pressure_deficit(temp: float, humidity: float) -> float:
+    """Difference in kPa between the saturation and actual vapour pressure."""
+    return saturation_vapour_pressure(temp) * (1 - humidity / 100) / 10
+
+
+def beaufort(windspeed: float) -> int:
+    """Beaufort force of a wind speed."""
+    return bisect_right(BEAUFORT_LIMITS, windspeed)
+
+
+def apparent_temperature(temp: float, humidity: float, windspeed: float) -> float:
+    """Apparent temperature in °C from humidity and wind, by the formula of
+    Steadman used by the Australian Bureau of Meteorology."""
+    return temp + 0.33 * vapour_pressure(temp, humidity) - 0.70 * windspeed - 4.00
+
+
+# (sensor_data key, function, source keys, Conversion kind, digits). The
+# digits apply where the Conversion kind does not round.
+DERIVED = (
+    ("absolute_humidity", absolute_humidity, ("temperature", "humidity"), "float", 1),
+    ("wetbulb", wet_bulb, ("temperature", "humidity"), "temperature", 1),
+    ("cloud_base", cloud_base, ("temperature", "dewpoint"), "height", 0),
+    (
+        "air_density",
+        air_density,
+        ("temperature", "humidity", "pressure"),
+        "float",
+        3,
+    ),
+    (
+        "vapour_pressure_deficit",
+        vapour_pressure_deficit,
+        ("temperature", "humidity"),
+        "float",
+        2,
+    ),
+    ("beaufort", beaufort, ("windspeed",), None, None),
+    (
+        "apparent_temperature",
+        apparent_temperature,
+        ("temperature", "humidity", "windspeed"),
+        "temperature",
+        1,
+    ),
+)
+
+DERIVED_KEYS = tuple(key for key, _, _, _, _ in DERIVED)
+
+# Keys of the metric values needed to derive all of DERIVED
+SOURCE_KEYS = tuple(
+    sorted({source for _, _, sources, _, _ in DERIVED for source in sources})
+)
+
+
+# Positions in SOURCE_KEYS of the sources of each of DERIVED
+SOURCE_INDEXES = tuple(
+    tuple(SOURCE_KEYS.index(source) for source in sources)
+    for _, _, sources, _, _ in DERIVED
+)
+
+
+def derive(values, plan) -> list:
+    """Return the values of DERIVED for a sequence of the metric values of
+    SOURCE_KEYS, in that order, converted with plan, a Conversion plan of the
+    kinds of DERIVED. A value is None when one of its sources is None."""
+    return [
+        _value(function, step, digits, [values[index] for index in indexes])
+        for (_, function, _, _, digits), indexes, step in zip(
+            DERIVED, SOURCE_INDEXES, plan
+        )
+    ]
+
+
+def derive_columns(columns, plan) -> list:
+    """Return columns with the values of DERIVED for a dict of columns of
+    metric values, as derive does for a single row."""
+    derived = []
+    for (_, function, sources, _, digits), step in zip(DERIVED, plan):
+        rows = zip(*[columns[source] for source in sources])
+        derived.append([_value(function, step, digits, inputs) for inputs in rows])
+    return derived
+
+
+def _value(function, step, digits, inputs):
+    if None in inputs:
+        return None
+    try:
+        value = function(*inputs)
+    except (ValueError, ZeroDivisionError, OverflowError):
+        return None
+    if step is not None:
+        scale, offset, step_digits = step
+        value = value * scale + offset
+        if step_digits is not None:
+            digits = step_digits
+    return value if digits is None else round(value, digits)
@@ -0,0 +1,161 @@
+"""Streams the polled Meteobridge data to a local file or UNIX socket."""
+import asyncio
+import json
+import logging
+import os
+import struct
+from collections import deque
+
+_LOGGER = logging.getLogger(__name__)
+
+# Records waiting to be written. When a sink falls behind, the oldest are
+# dropped, so the polls are never held up.
+QUEUE_SIZE = 1000
+# Records written in one go
+BATCH_SIZE = 100
+# Size of an export file before it is rotated, and the rotated files kept
+FILE_MAX_BYTES = 10 * 1024 * 1024
+FILE_BACKUPS = 3
+# Seconds to wait before connecting to a socket again
+SOCKET_RETRY = 10
+# Seconds a reader may take to accept a batch, before it counts as stalled
+SOCKET_WRITE_TIMEOUT = 5
+# Seconds to write the queued records in when stopping
+CLOSE_TIMEOUT = 5
+
+_LENGTH = struct.Struct(">I")
+
+
+class FileSink:
+    """Appends records as JSON lines to a file, rotated at max_bytes into
+    path.1 up to path.<backups>."""
+
+    def __init__(
+        self, path: str, max_bytes: int = FILE_MAX_BYTES, backups: int = FILE_BACKUPS
+    ):
+        self._path = path
+        self._max_bytes = max_bytes
+        self._backups = backups
+
+    async def write(self, records) -> None:
+        data = b"".join(json.dumps(record).encode() + b"\n" for record in records)
+        await asyncio.get_event_loop().run_in_executor(None, self._write, data)
+
+    async def close(self) -> None:
+        pass
+
+    def _write(self, data: bytes) -> None:
+        """Does file I/O."""
+        try:
+            size = os.path.getsize(self._path)
+        except FileNotFoundError:
+            size = 0
+        if size and size + len(data) > self._max_bytes:
+            for index in range(self._backups - 1, 0, -1):
+                source = f"{self._path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self._path}.{index + 1}")
+            os.replace(self._path, f"{self._path}.1")
+        with open(self._path, "ab") as export:
+            export.write(data)
+
+
+class SocketSink:
+    """Sends records to a UNIX domain socket, each as a 4 byte big-endian
+    length followed by that many bytes of JSON. Records sent while no
+    reader is listening, or to a reader that stalled, are lost."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._writer = None
+        self._retry_at = 0.0
+
+    async def write(self, records) -> None:
+        loop = asyncio.get_event_loop()
+        if self._writer is None:
+            if loop.time() < self._retry_at:
+                return
+            try:
+                _, self._writer = await asyncio.open_unix_connection(self._path)
+            except OSError as err:
+                _LOGGER.debug("Cannot connect to %s: %s", self._path, err)
+                self._retry_at = loop.time() + SOCKET_RETRY
+                return
+
+        payloads = [json.dumps(record).encode() for record in records]
+        self._writer.write(
+            b"".join(_LENGTH.pack(len(payload)) + payload for payload in payloads)
+        )
+        try:
+            await asyncio.wait_for(self._writer.drain(), SOCKET_WRITE_TIMEOUT)
+        except OSError as err:
+            _LOGGER.debug("Lost connection to %s: %s", self._path, err)
+            await self.close()
+        except asyncio.TimeoutError:
+            _LOGGER.warning("Reader of %s stalled, reconnecting later", self._path)
+            await self.close()
+            self._retry_at = loop.time() + SOCKET_RETRY
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            writer.close()
+
+
+class Exporter:
+    """Writes records to a sink in batches, from a background task.
+
+    add never blocks: records are queued, and when the sink cannot keep
+    up the oldest ones are dropped.
+    """
+
+    def __init__(self, sink, queue_size: int = QUEUE_SIZE):
+        self.dropped = 0
+        self._sink = sink
+        self._queue = deque(maxlen=queue_size)
+        self._ready = asyncio.Event()
+        self._closing = False
+        self._task = None
+
+    def start(self) -> None:
+        """Start writing in the background."""
+        self._task = asyncio.get_event_loop().create_task(self._run())
+
+    def add(self, record: dict) -> None:
+        """Queue a record to be written."""
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(record)
+        self._ready.set()
+
+    async def close(self, timeout: float = CLOSE_TIMEOUT) -> None:
+        """Write the queued records, and stop. Records not written within
+        timeout seconds are dropped."""
+        self._closing = True
+        self._ready.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except asyncio.TimeoutError:
+                _LOGGER.warning(
+                    "Dropped %d Meteobridge records not exported within %s s",
+                    len(self._queue),
+                    timeout,
+                )
+                self.dropped += len(self._queue)
+                self._queue.clear()
+        await self._sink.close()
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            while queue:
+                batch = [queue.popleft() for _ in range(min(BATCH_SIZE, len(queue)))]
+                try:
+                    await self._sink.write(batch)
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Error exporting Meteobridge data")
+            if self._closing:
+                return
@@ -0,0 +1,199 @@
+"""Append-only on-disk history of the numeric Meteobridge values."""
+import logging
+import mmap
+import os
+import threading
+import time
+import zlib
+from array import array
+
+_LOGGER = logging.getLogger(__name__)
+
+NAN = float("nan")
+SECONDS_PER_DAY = 86400
+
+
+class HistoryStore:
+    """Stores every poll as a fixed size record of doubles, one file per day.
+
+    A record is the timestamp followed by the values of keys in order. Values
+    that are missing or not numeric are stored as NaN. Segments are named
+    after their UTC day and live in a directory per record layout, so a
+    change of keys never mixes layouts in one file.
+    """
+
+    def __init__(self, path: str, keys):
+        self.keys = tuple(keys)
+        self._width = len(self.keys) + 1
+        self._record_size = self._width * array("d").itemsize
+        layout = zlib.crc32(",".join(self.keys).encode())
+        self._path = os.path.join(path, f"{layout:08x}")
+        self._lock = threading.Lock()
+
+    def record(self, timestamp: float, data: dict) -> array:
+        """Return the record for data, ready to be written."""
+        record = array("d", [timestamp])
+        for key in self.keys:
+            try:
+                record.append(float(data[key]))
+            except (KeyError, TypeError, ValueError):
+                record.append(NAN)
+        return record
+
+    def records(self, timestamps, columns: dict) -> list:
+        """Return the records for columns of values, as from decode_rows."""
+        rows = []
+        for key in self.keys:
+            column = columns.get(key)
+            rows.append([NAN] * len(timestamps) if column is None else column)
+        records = []
+        for timestamp, *values in zip(timestamps, *rows):
+            record = array("d", [timestamp])
+            for value in values:
+                try:
+                    record.append(float(value))
+                except (TypeError, ValueError):
+                    record.append(NAN)
+            records.append(record)
+        return records
+
+    def write(self, records) -> None:
+        """Append records to the segment of their day. Does file I/O."""
+        if isinstance(records, array):
+            records = [records]
+        with self._lock:
+            os.makedirs(self._path, exist_ok=True)
+            day = segment = None
+            try:
+                for record in records:
+                    record_day = _day(record[0])
+                    if record_day != day:
+                        if segment is not None:
+                            segment.close()
+                        day = record_day
+                        segment = open(self._segment(day), "ab")
+                    record.tofile(segment)
+            finally:
+                if segment is not None:
+                    segment.close()
+
+    def insert(self, records) -> None:
+        """Merge records, in any order, into their segments. Unlike write
+        this rewrites every segment touched, so use it for backfills only.
+        Does file I/O."""
+        days = {}
+        for record in records:
+            days.setdefault(_day(record[0]), []).append(record)
+
+        width = self._width
+        with self._lock:
+            os.makedirs(self._path, exist_ok=True)
+            for day, new_records in days.items():
+                path = self._segment(day)
+                existing = array("d")
+                if os.path.exists(path):
+                    with open(path, "rb") as segment:
+                        count = os.fstat(segment.fileno()).st_size // self._record_size
+                        existing.fromfile(segment, count * width)
+                merged = [
+                    existing[index : index + width]
+                    for index in range(0, len(existing), width)
+                ]
+                merged.extend(new_records)
+                merged.sort(key=lambda record: record[0])
+
+                with open(path + ".tmp", "wb") as segment:
+                    for record in merged:
+                        record.tofile(segment)
+                os.replace(path + ".tmp", path)
+
+    def query(self, start: float, end: float) -> dict:
+        """Return the records from start up to end as columns.
+
+        The result maps "time" and every key to an array of doubles.
+        """
+        columns = {key: array("d") for key in ("time",) + self.keys}
+        targets = list(columns.values())
+        with self._lock:
+            day = start - start % SECONDS_PER_DAY
+            while day < end:
+                self._read(self._segment(_day(day)), start, end, targets)
+                day += SECONDS_PER_DAY
+        return columns
+
+    def window(self, seconds: float) -> dict:
+        """Return the records of the last seconds as columns."""
+        now = time.time()
+        return self.query(now - seconds, now + 1)
+
+    def compact(self, keep_days: int) -> None:
+        """Remove the segments older than keep_days. Does file I/O."""
+        cutoff = _day(time.time() - keep_days * SECONDS_PER_DAY)
+        with self._lock:
+            if not os.path.isdir(self._path):
+                return
+            for name in os.listdir(self._path):
+                if name.endswith(".bin") and name[:-4] < cutoff:
+                    _LOGGER.debug("Removing history segment %s", name)
+                    os.remove(os.path.join(self._path, name))
+
+    def last_timestamp(self):
+        """Return the timestamp of the newest record, or None. Does file I/O."""
+        with self._lock:
+            if not os.path.isdir(self._path):
+                return None
+            for name in sorted(os.listdir(self._path), reverse=True):
+                if not name.endswith(".bin"):
+                    continue
+                with open(os.path.join(self._path, name), "rb") as segment:
+                    count = os.fstat(segment.fileno()).st_size // self._record_size
+                    if not count:
+                        continue
+                    segment.seek((count - 1) * self._record_size)
+                    record = array("d")
+                    record.fromfile(segment, 1)
+                    return record[0]
+        return None
+
+    def _segment(self, day: str) -> str:
+        return os.path.join(self._path, f"{day}.bin")
+
+    def _read(self, path, start, end, targets) -> None:
+        """Copy the records of one segment within start and end to targets."""
+        try:
+            segment = open(path, "rb")
+        except FileNotFoundError:
+            return
+
+        with segment:
+            # A partly written last record is ignored
+            count = os.fstat(segment.fileno()).st_size // self._record_size
+            if not count:
+                return
+            width = self._width
+            with mmap.mmap(
+                segment.fileno(), count * self._record_size, access=mmap.ACCESS_READ
+            ) as mapped:
+                with memoryview(mapped) as raw, raw.cast("d") as values:
+                    first = _bisect(values, width, count, start)
+                    last = _bisect(values, width, count, end)
+                    stop = last * width
+                    for index, target in enumerate(targets):
+                        with values[first * width + index : stop : width] as column:
+                            target.frombytes(column.tobytes())
+
+
+def _day(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+def _bisect(values, width, count, timestamp) -> int:
+    """Return the first record at or after timestamp."""
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        if values[middle * width] < timestamp:
+            low = middle + 1
+        else:
+            high = middle
+    return low
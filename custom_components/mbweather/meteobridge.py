@@ -5,10 +5,20 @@
    License: MIT
 """
 
-import csv
 import aiohttp
+import asyncio
+import calendar
 import logging
-from datetime import datetime
+import time
+from array import array
+from collections import ChainMap
+from collections.abc import Mapping
+from yarl import URL
+
+from .aggregates import RollingAggregates
+from .breaker import CircuitBreaker
+from .derived import DERIVED, DERIVED_KEYS, SOURCE_KEYS, derive, derive_columns
+from .stats import PollStats
 
 
 class UnexpectedError(Exception):
@@ -17,8 +27,160 @@ class UnexpectedError(Exception):
     pass
 
 
+class CircuitOpenError(UnexpectedError):
+    """The Logger failed too often, and is not polled for a while."""
+
+    pass
+
+
 _LOGGER = logging.getLogger(__name__)
 
+# How often a field is requested. FAST fields on every poll, SLOW fields,
+# which change a few times a day, once every SLOW_INTERVAL seconds.
+FAST = "fast"
+SLOW = "slow"
+SLOW_INTERVAL = 600
+
+# Every value requested from the Logger as (template tag, sensor_data key,
+# Conversion kind, refresh). The request templates and the decoder are all built
+# from this table, so adding a field is a one-line change. The forecast text
+# must stay last, as it can contain the field delimiter. A missing sensor is
+# sent as "--" rather than 0, so it is not mistaken for a reading.
+FIELDS = (
+    ("[th0temp-act:--]", "temperature", "temperature", FAST),
+    ("[thb0seapress-act:--]", "pressure", "pressure", FAST),
+    ("[th0hum-act:--]", "humidity", None, FAST),
+    ("[wind0avgwind-act:--]", "windspeedavg", "speed", FAST),
+    ("[wind0dir-avg5.0:--]", "windbearing", "float", FAST),
+    ("[rain0total-daysum:--]", "raintoday", "volume", FAST),
+    ("[rain0rate-act:--]", "rainrate", "rate", FAST),
+    ("[th0dew-act:--]", "dewpoint", "temperature", FAST),
+    ("[wind0chill-act:--]", "windchill", "temperature", FAST),
+    ("[wind0wind-max1:--]", "windgust", "speed", FAST),
+    ("[th0lowbat-act.0:--]", "lowbat", None, SLOW),
+    ("[thb0temp-act:--]", "in_temperature", "temperature", FAST),
+    ("[thb0hum-act.0:--]", "in_humidity", None, FAST),
+    ("[th0temp-dmax:--]", "temphigh", "temperature", FAST),
+    ("[th0temp-dmin:--]", "templow", "temperature", FAST),
+    ("[wind0wind-act:--]", "windspeed", "speed", FAST),
+    ("[th0heatindex-act.1:--]", "heatindex", "temperature", FAST),
+    ("[uv0index-act:--]", "uvindex", "float", FAST),
+    ("[sol0rad-act:--]", "solarrad", "float", FAST),
+    ("[th0temp-mmin.1:--]", "temp_mmin", "temperature", SLOW),
+    ("[th0temp-mmax.1:--]", "temp_mmax", "temperature", SLOW),
+    ("[th0temp-ymin.1:--]", "temp_ymin", "temperature", SLOW),
+    ("[th0temp-ymax.1:--]", "temp_ymax", "temperature", SLOW),
+    ("[wind0wind-mmax.1:--]", "windspeed_mmax", "speed", SLOW),
+    ("[wind0wind-ymax.1:--]", "windspeed_ymax", "speed", SLOW),
+    ("[rain0total-mmax.1:--]", "rain_mmax", "volume", SLOW),
+    ("[rain0total-ymax.1:--]", "rain_ymax", "volume", SLOW),
+    ("[rain0rate-mmax.1:--]", "rainrate_mmax", "volume", SLOW),
+    ("[rain0rate-ymax.1:--]", "rainrate_ymax", "volume", SLOW),
+    ("[forecast-text:]", "forecast", None, SLOW),
+)
+
+# Keys of an Observation: the fields, followed by the values derived from them
+OBSERVATION_KEYS = (
+    tuple(key for _, key, _, _ in FIELDS)
+    + ("winddirection", "feels_like", "lowbattery", "raining", "freezing")
+    + ("time", "timestamp")
+    + DERIVED_KEYS
+)
+OBSERVATION_INDEX = {key: index for index, key in enumerate(OBSERVATION_KEYS)}
+FIELD_INDEX = {key: index for index, (_, key, _, _) in enumerate(FIELDS)}
+
+# Fields passed on as text, that must still hold a number to be valid
+TEXT_NUMBERS = tuple(
+    key for _, key, kind, _ in FIELDS if kind is None and key != "forecast"
+)
+
+# Keys of sensor_data holding a number, in a fixed order
+NUMERIC_KEYS = tuple(
+    key for _, key, _, _ in FIELDS if key not in ("lowbat", "forecast")
+) + ("feels_like",)
+
+# Every row starts with its UTC epoch and the Logger local time, formatted
+# by the Logger as shown, so neither depends on the time zone of the host
+# and neither is parsed or built on a poll
+TIME_TAGS = "[epoch];[DD]-[MM]-[YYYY] [hh]:[mm]:[ss];"
+TEMPLATE = TIME_TAGS + ";".join(tag for tag, _, _, _ in FIELDS)
+# Template of the polls between two full ones, with the FAST fields only
+FAST_TEMPLATE = TIME_TAGS + ";".join(
+    tag for tag, _, _, refresh in FIELDS if refresh == FAST
+)
+
+NAN = float("nan")
+
+# Connection policy for the Logger. It is a small embedded device polled
+# every few seconds, so one kept-alive connection is reused between polls.
+# A Logger on the local network answers well within the connect and read
+# timeouts, so anything slower is treated as a failure.
+CONNECTION_LIMIT = 2
+KEEPALIVE_TIMEOUT = 60
+DNS_CACHE_TTL = 300
+REQUEST_TIMEOUT = 10
+CONNECT_TIMEOUT = 3
+READ_TIMEOUT = 5
+
+# Keys of the columns returned by decode_batch
+BATCH_KEYS = NUMERIC_KEYS + DERIVED_KEYS
+# Batches of up to this many rows are decoded on the event loop, larger ones
+# in the executor of the Meteobridge
+BATCH_INLINE_ROWS = 100
+
+# Timestamp format and timeout of a history query
+HISTORY_TIME_FORMAT = "%Y%m%d%H%M%S"
+HISTORY_TIMEOUT = 60
+
+
+class Observation(Mapping):
+    """One decoded poll of the Logger. Immutable, and stored as a single
+    tuple of values, so it is cheap to keep many. Reads like a dict of
+    the sensor_data keys in OBSERVATION_KEYS."""
+
+    __slots__ = ("_values",)
+
+    def __init__(self, values):
+        self._values = tuple(values)
+
+    def __getitem__(self, key):
+        return self._values[OBSERVATION_INDEX[key]]
+
+    def __contains__(self, key):
+        return key in OBSERVATION_INDEX
+
+    def __iter__(self):
+        return iter(OBSERVATION_KEYS)
+
+    def __len__(self):
+        return len(OBSERVATION_KEYS)
+
+    def __eq__(self, other):
+        if isinstance(other, Observation):
+            return self._values == other._values
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Observation({dict(self)})"
+
+    def missing(self) -> frozenset:
+        """Returns the keys without a valid value."""
+        return frozenset(
+            key for key, value in zip(OBSERVATION_KEYS, self._values) if value is None
+        )
+
+    def changed(self, other) -> set:
+        """Returns the keys whose value differs from other Observation."""
+        if other is None:
+            return set(OBSERVATION_KEYS)
+        return {
+            key
+            for key, new, old in zip(OBSERVATION_KEYS, self._values, other._values)
+            if new != old
+        }
+
 
 class Meteobridge:
     """Main class to retrieve the data from the Logger."""
@@ -31,182 +193,428 @@ class Meteobridge:
         Pass: str,
         unit_system: str,
         ssl: bool = False,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        executor=None,
+        push_only: bool = False,
     ):
         self._host = Host
         self._user = User
         self._pass = Pass
         self._ssl = ssl
         self._unit_system = unit_system
-        self.sensor_data = {}
+        # Latest Observation of the Logger, the aggregates of those and the
+        # diagnostics of the poll path
+        self.observation = None
+        self.aggregates = {}
+        self.diagnostics = {}
+        # Values set by other components, such as the Dark Sky condition
+        self.extra_data = {}
+        # Read-only view of all of the above, extra data first. Writes go
+        # to extra_data.
+        self.sensor_data = ChainMap(self.extra_data, {}, {}, {})
+        self.stats = PollStats()
+        # Keys whose value differs from the previous update
+        self.changed = frozenset()
+        # Keys without a valid value in the latest update, and the last valid
+        # value of each as (value, epoch seconds)
+        self.invalid = frozenset()
+        self.last_valid = {}
+        self._previous_extra = {}
+        self._pushed = None
+        self._aggregates = RollingAggregates()
+        self._cnv = Conversion()
+        self._plan = self._cnv.plan([kind for _, _, kind, _ in FIELDS], unit_system)
+        self._derived_plan = self._cnv.plan(
+            [kind for _, _, _, kind, _ in DERIVED], unit_system
+        )
+        # Positions within a raw row of the metric values needed by DERIVED
+        self._sources = tuple(2 + FIELD_INDEX[key] for key in SOURCE_KEYS)
+        self._text_numbers = tuple(FIELD_INDEX[key] for key in TEXT_NUMBERS)
+
+        scheme = "https" if self._ssl == True else "http"
+        url = URL(f"{scheme}://{self._host}/cgi-bin/template.cgi")
+        self._url = url.with_query(template=TEMPLATE)
+        self._fast_url = url.with_query(template=FAST_TEMPLATE)
+        self._fast_fields = tuple(
+            index for index, field in enumerate(FIELDS) if field[3] == FAST
+        )
+        # Raw fields of the last full row, completing the fast polls, and the
+        # monotonic time it was decoded
+        self._full_values = None
+        self._full_time = None
+        self._auth = aiohttp.BasicAuth(self._user, self._pass)
+        self._timeout = aiohttp.ClientTimeout(
+            total=REQUEST_TIMEOUT, connect=connect_timeout, sock_read=read_timeout
+        )
+        self.breaker = CircuitBreaker()
+
+        # Time of the last successful update, and the Logger time of the last
+        # Observation before an outage
+        self.last_update = None
+        self._gap_start = None
 
+        # Executor for large decode batches, None for the default one
+        self._executor = executor
+
+        # A Logger that pushes its data is never polled
+        self.push_only = push_only
+
+        # Without a session passed in, a dedicated one is created on first use
         self.req = session
+        self._owns_session = session is None
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        """Creates a session tuned for polling a single Logger."""
+        connector = aiohttp.TCPConnector(
+            limit=CONNECTION_LIMIT,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=self._timeout,
+            trace_configs=[self._trace_config()],
+        )
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """Times the setup of new connections, including DNS lookups."""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_connection_create_start(session, context, params):
+            context.connect_start = time.monotonic()
+
+        async def on_connection_create_end(session, context, params):
+            self.stats.add("connect", time.monotonic() - context.connect_start)
+
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        return trace_config
+
+    async def close(self) -> None:
+        """Closes the dedicated session, if this instance created one."""
+        if self._owns_session and self.req is not None:
+            await self.req.close()
+            self.req = None
 
     async def update(self) -> dict:
-        """Updates the sensor data."""
-        await self._get_sensor_data()
+        """Updates the sensor data.
+        Uses the payload pushed by the Logger if there is one, else polls.
+        Raises CircuitOpenError without polling while the Logger is down,
+        and UnexpectedError without a payload if the Logger only pushes."""
+        self.changed = frozenset()
+        if self._pushed is None and self.push_only:
+            raise UnexpectedError(f"Meteobridge {self._host} pushed no new data")
+        if self._pushed is None and not self.breaker.allow():
+            raise CircuitOpenError(
+                f"Meteobridge {self._host} is unreachable, "
+                f"retrying in {self.breaker.retry_in():.0f} s"
+            )
+        try:
+            if self._pushed is not None:
+                observation, self._pushed = self._pushed, None
+                self._set_sensor_data(observation)
+            else:
+                start = time.monotonic()
+                await self._get_sensor_data()
+                self.stats.add("poll", time.monotonic() - start)
+        except Exception as err:
+            self.stats.errors += 1
+            if self._gap_start is None and self.observation is not None:
+                self._gap_start = self.observation["timestamp"]
+            delay = self.breaker.failure()
+            if delay is not None:
+                _LOGGER.warning(
+                    "Meteobridge %s failed %d times (%s), retrying in %.0f s",
+                    self._host,
+                    self.breaker.failures,
+                    str(err) or type(err).__name__,
+                    delay,
+                )
+            raise
+        if self.breaker.success():
+            _LOGGER.info("Meteobridge %s is reachable again", self._host)
+        self.last_update = time.time()
         return self.sensor_data
 
-    async def _get_sensor_data(self) -> None:
-        """Gets the sensor data from the Meteobridge Logger"""
-
-        dataTemplate = "[DD]/[MM]/[YYYY];[hh]:[mm]:[ss];[th0temp-act:0];[thb0seapress-act:0];[th0hum-act:0];[wind0avgwind-act:0];[wind0dir-avg5.0:0];[rain0total-daysum:0];[rain0rate-act:0];[th0dew-act:0];[wind0chill-act:0];[wind0wind-max1:0];[th0lowbat-act.0:0];[thb0temp-act:0];[thb0hum-act.0:0];[th0temp-dmax:0];[th0temp-dmin:0];[wind0wind-act:0];[th0heatindex-act.1:0];[uv0index-act:0];[sol0rad-act:0];[th0temp-mmin.1:0];[th0temp-mmax.1:0];[th0temp-ymin.1:0];[th0temp-ymax.1:0];[wind0wind-mmax.1:0];[wind0wind-ymax.1:0];[rain0total-mmax.1:0];[rain0total-ymax.1:0];[rain0rate-mmax.1:0];[rain0rate-ymax.1:0];[forecast-text:]"
-        preUrl = "https://"
-        if self._ssl != True:
-            preUrl = "http://"
-
-        reqUrl = (
-            preUrl
-            + self._user
-            + ":"
-            + self._pass
-            + "@"
-            + self._host
-            + "/cgi-bin/template.cgi?template="
-            + dataTemplate
+    def pop_gap(self):
+        """Returns the (start, end) of the last outage once it has ended, as
+        the timestamps of the Observations around it, and forgets it.
+        Returns None without an outage."""
+        if self._gap_start is None or self.observation is None:
+            return None
+        gap = (self._gap_start, self.observation["timestamp"])
+        self._gap_start = None
+        return gap
+
+    async def fetch_history(self, start: float, end: float) -> str:
+        """Gets the rows the Logger recorded between start and end, with the
+        same template as a poll. Experimental: uses from and to parameters
+        of template.cgi, in Logger local time, which are not documented by
+        Meteobridge and only implemented by the simulator of the tests. A
+        Logger that ignores them answers with the current row only. Call
+        after the first update."""
+        if self.req is None:
+            self.req = self._create_session()
+
+        offset = self._utc_offset()
+        url = self._url.update_query(
+            {
+                "from": time.strftime(HISTORY_TIME_FORMAT, time.gmtime(start + offset)),
+                "to": time.strftime(HISTORY_TIME_FORMAT, time.gmtime(end + offset)),
+            }
+        )
+        timeout = aiohttp.ClientTimeout(total=HISTORY_TIMEOUT)
+        async with self.req.get(url, auth=self._auth, timeout=timeout) as response:
+            if response.status != 200:
+                raise UnexpectedError(
+                    f"Fetching Meteobridge history failed: {response.status} - Reason: {response.reason}"
+                )
+            content = await response.read()
+        return content.decode("utf-8")
+
+    def _utc_offset(self) -> int:
+        """Returns the seconds the Logger clock runs ahead of UTC, from the
+        local time and epoch of the last Observation."""
+        if self.observation is None:
+            raise UnexpectedError(f"Meteobridge {self._host} has not been polled")
+        shown = self.observation["time"]
+        local = calendar.timegm(
+            (
+                int(shown[6:10]),
+                int(shown[3:5]),
+                int(shown[0:2]),
+                int(shown[11:13]),
+                int(shown[14:16]),
+                int(shown[17:19]),
+            )
+        )
+        return local - self.observation["timestamp"]
+
+    async def decode_batch(self, payloads):
+        """Decodes the rows of many template responses into compact columns,
+        as decode_batch. Small batches are decoded right away, large ones
+        in the executor so they do not block the event loop."""
+        if sum(payload.count("\n") + 1 for payload in payloads) <= BATCH_INLINE_ROWS:
+            return decode_batch(payloads, self._unit_system)
+        return await asyncio.get_event_loop().run_in_executor(
+            self._executor, decode_batch, payloads, self._unit_system
         )
 
-        async with self.req.get(reqUrl,) as response:
+    def restore_aggregates(self, columns: dict) -> None:
+        """Feeds the rolling aggregates with earlier values, as the columns
+        from HistoryStore.query, so they cover their whole window from the
+        first poll on. Call before the first update."""
+        offset = time.monotonic() - time.time()
+        sources = self._aggregates.sources
+        for timestamp, *values in zip(
+            columns["time"], *(columns[key] for key in sources)
+        ):
+            # NaN, a missing value, is the only value not equal to itself
+            self._aggregates.add(
+                timestamp + offset,
+                {
+                    key: value if value == value else None
+                    for key, value in zip(sources, values)
+                },
+            )
+
+    def push(self, content: str) -> None:
+        """Decodes a template payload pushed by the Logger.
+        It is stored by the next update, instead of polling the Logger."""
+        self._pushed = self._decode(content)
+
+    def _set_sensor_data(self, observation: Observation) -> None:
+        """Stores a decoded Observation and records which keys changed."""
+        aggregates = self._aggregates.add(time.monotonic(), observation)
+        diagnostics = self.stats.sensor_data()
+        changed = observation.changed(self.observation)
+        for new, old in (
+            (aggregates, self.aggregates),
+            (diagnostics, self.diagnostics),
+            (self.extra_data, self._previous_extra),
+        ):
+            changed.update(key for key, value in new.items() if old.get(key) != value)
+        self.changed = frozenset(changed)
+        self._previous_extra = dict(self.extra_data)
+        self._track_invalid(observation)
+        self.observation = observation
+        self.aggregates = aggregates
+        self.diagnostics = diagnostics
+        self.sensor_data.maps[1:] = [observation, aggregates, diagnostics]
+
+    def _track_invalid(self, observation: Observation) -> None:
+        """Records the keys that lost or regained a valid value."""
+        invalid = observation.missing()
+        previous = self.observation
+        lost = invalid - self.invalid
+        if lost:
+            for key in lost:
+                if previous is not None and previous[key] is not None:
+                    self.last_valid[key] = (previous[key], previous["timestamp"])
+            _LOGGER.warning(
+                "Meteobridge %s sent no valid %s", self._host, ", ".join(sorted(lost))
+            )
+        for key in self.invalid - invalid:
+            self.last_valid.pop(key, None)
+            _LOGGER.debug("Meteobridge %s sends a valid %s again", self._host, key)
+        self.invalid = invalid
+
+    def age(self, key: str):
+        """Returns the seconds since key last had a valid value, 0 if it has
+        one now, or None if it never had one."""
+        if key not in self.invalid:
+            return 0
+        if key not in self.last_valid:
+            return None
+        return time.time() - self.last_valid[key][1]
+
+    def _decode(self, content: str, fast: bool = False) -> Observation:
+        """Decodes the last row of a template response in a single pass.
+        A fast row, of FAST_TEMPLATE, is completed with the SLOW fields of
+        the last full row."""
+        line = content.rstrip().rpartition("\n")[2]
+        if fast:
+            values = line.split(";")
+            if len(values) != len(self._fast_fields) + 2:
+                raise UnexpectedError(
+                    f"Meteobridge returned {len(values)} fields, "
+                    f"expected {len(self._fast_fields) + 2}"
+                )
+            fields = list(self._full_values)
+            for index, value in zip(self._fast_fields, values[2:]):
+                fields[index] = value
+            values[2:] = fields
+        else:
+            # The forecast text is last, so it keeps any embedded delimiters
+            values = line.split(";", len(FIELDS) + 1)
+            if len(values) < len(FIELDS) + 2:
+                raise UnexpectedError(
+                    f"Meteobridge returned {len(values)} fields, "
+                    f"expected {len(FIELDS) + 2}"
+                )
+            self._full_values = values[2:]
+            self._full_time = time.monotonic()
+
+        # A field that is not a number becomes None, marking just that
+        # value invalid instead of failing the whole poll
+        start = time.monotonic()
+        row = self._cnv.apply(self._plan, values[2:])
+        for index in self._text_numbers:
+            if _number(row[index]) is None:
+                row[index] = None
+        self.stats.add("convert", time.monotonic() - start)
+
+        bearing = row[FIELD_INDEX["windbearing"]]
+        temperature = row[FIELD_INDEX["temperature"]]
+        lowbat = row[FIELD_INDEX["lowbat"]]
+        rainrate = row[FIELD_INDEX["rainrate"]]
+        if bearing is not None:
+            row[FIELD_INDEX["windbearing"]] = int(bearing)
+        row.append(None if bearing is None else self._cnv.wind_direction(bearing))
+        row.append(
+            self._cnv.feels_like(
+                temperature,
+                row[FIELD_INDEX["heatindex"]],
+                row[FIELD_INDEX["windchill"]],
+                self._unit_system,
+            )
+        )
+        row.append(None if lowbat is None else float(lowbat) > 0)
+        row.append(None if rainrate is None else rainrate > 0)
+        row.append(None if temperature is None else temperature < 0)
+        row.append(values[1])
+        row.append(int(values[0]))
+        metric = [_number(values[index]) for index in self._sources]
+        row.extend(derive(metric, self._derived_plan))
+        return Observation(row)
+
+    async def _get_sensor_data(self) -> None:
+        """Gets the sensor data from the Meteobridge Logger. Only the FAST
+        fields are requested, unless the SLOW ones are due as well."""
+
+        if self.req is None:
+            self.req = self._create_session()
+
+        start = time.monotonic()
+        fast = self._full_time is not None and start - self._full_time < SLOW_INTERVAL
+        async with self.req.get(
+            self._fast_url if fast else self._url,
+            auth=self._auth,
+            timeout=self._timeout,
+        ) as response:
             if response.status == 200:
                 content = await response.read()
-                decoded_content = content.decode("utf-8")
-
-                cr = csv.reader(decoded_content.splitlines(), delimiter=";")
-                rows = list(cr)
-                cnv = Conversion()
-
-                for values in rows:
-                    self._timestamp = datetime.strptime(
-                        values[0] + " " + values[1], "%d/%m/%Y %H:%M:%S"
-                    )
-
-                    self._outtemp = cnv.temperature(float(values[2]), self._unit_system)
-                    self._press = cnv.pressure(float(values[3]), self._unit_system)
-                    self._outhum = values[4]
-                    self._windspeedavg = cnv.speed(float(values[5]), self._unit_system)
-                    self._windbearing = int(float(values[6]))
-                    self._winddir = cnv.wind_direction(float(values[6]))
-                    self._raintoday = cnv.volume(float(values[7]), self._unit_system)
-                    self._rainrate = cnv.rate(float(values[8]), self._unit_system)
-                    self._outdew = cnv.temperature(float(values[9]), self._unit_system)
-                    self._windchill = cnv.temperature(
-                        float(values[10]), self._unit_system
-                    )
-                    self._windgust = cnv.speed(float(values[11]), self._unit_system)
-                    self._lowbat = values[12]
-                    self._intemp = cnv.temperature(float(values[13]), self._unit_system)
-                    self._inhum = values[14]
-                    self._temphigh = cnv.temperature(
-                        float(values[15]), self._unit_system
-                    )
-                    self._templow = cnv.temperature(
-                        float(values[16]), self._unit_system
-                    )
-                    self._windspeed = cnv.speed(float(values[17]), self._unit_system)
-                    self._heatindex = cnv.temperature(
-                        float(values[18]), self._unit_system
-                    )
-                    self._uvindex = float(values[19])
-                    self._solarrad = float(values[20])
-                    self._feels_like = cnv.feels_like(
-                        self._outtemp,
-                        self._heatindex,
-                        self._windchill,
-                        self._unit_system,
-                    )
-                    self._tempmmin = cnv.temperature(
-                        float(values[21]), self._unit_system
-                    )
-                    self._tempmmax = cnv.temperature(
-                        float(values[22]), self._unit_system
-                    )
-                    self._tempymin = cnv.temperature(
-                        float(values[23]), self._unit_system
-                    )
-                    self._tempymax = cnv.temperature(
-                        float(values[24]), self._unit_system
-                    )
-                    self._windmmax = cnv.speed(float(values[25]), self._unit_system)
-                    self._windymax = cnv.speed(float(values[26]), self._unit_system)
-                    self._rainmmax = cnv.volume(float(values[27]), self._unit_system)
-                    self._rainymax = cnv.volume(float(values[28]), self._unit_system)
-                    self._rainratemmax = cnv.volume(
-                        float(values[29]), self._unit_system
-                    )
-                    self._rainrateymax = cnv.volume(
-                        float(values[30]), self._unit_system
-                    )
-                    self._fc = values[31]
-
-                    self._isfreezing = True if float(self._outtemp) < 0 else False
-                    self._israining = True if float(self._rainrate) > 0 else False
-                    self._islowbat = True if float(self._lowbat) > 0 else False
-
-                    # Data below is comming from Dark Sky, and is updated by external component. Thus we need to check if available
-                    # and don't overwrite values if present.
-                    if "condition" in self.sensor_data:
-                        if self.sensor_data["condition"] is not None:
-                            self._condition = self.sensor_data["condition"]
-                        else:
-                            self._condition = None
-                    else:
-                        self._condition = None
-
-                    if "precip_probability" in self.sensor_data:
-                        if self.sensor_data["precip_probability"] is not None:
-                            self._precip_probability = self.sensor_data[
-                                "precip_probability"
-                            ]
-                        else:
-                            self._precip_probability = None
-                    else:
-                        self._precip_probability = None
-
-                item = {
-                    "in_temperature": self._intemp,
-                    "in_humidity": self._inhum,
-                    "temperature": self._outtemp,
-                    "temphigh": self._temphigh,
-                    "templow": self._templow,
-                    "humidity": self._outhum,
-                    "dewpoint": self._outdew,
-                    "windbearing": self._windbearing,
-                    "winddirection": self._winddir,
-                    "windspeedavg": self._windspeedavg,
-                    "windspeed": self._windspeed,
-                    "windgust": self._windgust,
-                    "windchill": self._windchill,
-                    "heatindex": self._heatindex,
-                    "feels_like": self._feels_like,
-                    "pressure": self._press,
-                    "rainrate": self._rainrate,
-                    "raintoday": self._raintoday,
-                    "uvindex": self._uvindex,
-                    "solarrad": self._solarrad,
-                    "lowbattery": self._islowbat,
-                    "raining": self._israining,
-                    "freezing": self._isfreezing,
-                    "forecast": self._fc,
-                    "time": self._timestamp.strftime("%d-%m-%Y %H:%M:%S"),
-                    "condition": self._condition,
-                    "precip_probability": self._precip_probability,
-                    "temp_mmin": self._tempmmin,
-                    "temp_mmax": self._tempmmax,
-                    "temp_ymin": self._tempymin,
-                    "temp_ymax": self._tempymax,
-                    "windspeed_mmax": self._windmmax,
-                    "windspeed_ymax": self._windymax,
-                    "rain_mmax": self._rainmmax,
-                    "rain_ymax": self._rainymax,
-                    "rainrate_mmax": self._rainratemmax,
-                    "rainrate_ymax": self._rainrateymax,
-                }
-                self.sensor_data.update(item)
+                received = time.monotonic()
+                self.stats.add("response", received - start)
+                self.stats.bytes_received += len(content)
+                observation = self._decode(content.decode("utf-8"), fast)
+                self.stats.add("decode", time.monotonic() - received)
+                self._set_sensor_data(observation)
             else:
                 raise UnexpectedError(
                     f"Fetching Meteobridge data failed: {response.status} - Reason: {response.reason}"
                 )
 
 
+def decode_rows(content: str, unit_system: str):
+    """Decodes every row of a template response, column by column.
+    Returns the row timestamps as epoch seconds and a dict of columns.
+    Rows with missing fields are skipped."""
+    count = len(FIELDS) + 2
+    rows = [line.split(";", count - 1) for line in content.splitlines()]
+    rows = [row for row in rows if len(row) == count]
+    if not rows:
+        return [], {}
+
+    cnv = Conversion()
+    columns = list(zip(*rows))
+    timestamps = [int(epoch) for epoch in columns[0]]
+    values = columns[2:]
+    plan = cnv.plan([kind for _, _, kind, _ in FIELDS], unit_system)
+    data = dict(zip((key for _, key, _, _ in FIELDS), cnv.apply_columns(plan, values)))
+    for key in TEXT_NUMBERS:
+        data[key] = [None if _number(value) is None else value for value in data[key]]
+    data["feels_like"] = [
+        cnv.feels_like(temp, heatindex, windchill, unit_system)
+        for temp, heatindex, windchill in zip(
+            data["temperature"], data["heatindex"], data["windchill"]
+        )
+    ]
+    metric = {
+        key: [_number(value) for value in values[FIELD_INDEX[key]]]
+        for key in SOURCE_KEYS
+    }
+    derived_plan = cnv.plan([kind for _, _, _, kind, _ in DERIVED], unit_system)
+    data.update(zip(DERIVED_KEYS, derive_columns(metric, derived_plan)))
+    return timestamps, data
+
+
+def decode_batch(payloads, unit_system: str):
+    """Decodes the rows of many template responses. Returns the timestamps
+    and a dict of the BATCH_KEYS columns, as arrays of doubles with NaN for
+    missing values. A plain function, so it can run in a process pool."""
+    timestamps, data = decode_rows("\n".join(payloads), unit_system)
+    columns = {}
+    for key in BATCH_KEYS:
+        column = array("d")
+        for value in data.get(key, ()):
+            try:
+                column.append(float(value))
+            except (TypeError, ValueError):
+                column.append(NAN)
+        columns[key] = column
+    return array("d", timestamps), columns
+
+
+def _number(value):
+    """Return a raw value as a float, or None if it is not a number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
 class Conversion:
 
     """
@@ -219,6 +627,75 @@ class Conversion:
     Distance: km
     """
 
+    # (scale, offset, digits) for metric and imperial output of each kind,
+    # applied as round(value * scale + offset, digits). Kinds with digits
+    # set to None are returned unrounded.
+    PLANS = {
+        "temperature": ((1, 0, 1), (1.8, 32, 1)),
+        "volume": ((1, 0, 1), (0.0393700787, 0, 2)),
+        "rate": ((1, 0, 2), (0.0393700787, 0, 2)),
+        "pressure": ((1, 0, 1), (0.0295299801647, 0, 3)),
+        "speed": ((1, 0, 1), (2.2369362921, 0, 1)),
+        "distance": ((1, 0, 0), (0.621371192, 0, 1)),
+        "height": ((1, 0, 0), (3.2808399, 0, 0)),
+        "float": ((1, 0, None), (1, 0, None)),
+    }
+
+    def plan(self, kinds, unit):
+        """Return a frozen conversion plan for a sequence of kinds.
+        A kind of None passes the raw string through unchanged."""
+        imperial = unit.lower() == "imperial"
+        return tuple(
+            None if kind is None else self.PLANS[kind][imperial] for kind in kinds
+        )
+
+    @staticmethod
+    def apply(plan, values):
+        """Convert a row of raw string values with a plan from plan()."""
+        converted = []
+        append = converted.append
+        for step, value in zip(plan, values):
+            if step is None:
+                append(value)
+                continue
+            scale, offset, digits = step
+            try:
+                if digits is None:
+                    append(float(value) * scale + offset)
+                else:
+                    append(round(float(value) * scale + offset, digits))
+            except ValueError:
+                append(None)
+        return converted
+
+    @staticmethod
+    def apply_columns(plan, columns):
+        """Convert columns of raw string values with a plan from plan().
+        Each step runs once over a whole column, for batches of rows. A
+        column with values that are not numbers is converted value by
+        value, with None for those."""
+        converted = []
+        for step, column in zip(plan, columns):
+            if step is None:
+                converted.append(list(column))
+                continue
+            scale, offset, digits = step
+            try:
+                if digits is None:
+                    converted.append(
+                        [float(value) * scale + offset for value in column]
+                    )
+                else:
+                    converted.append(
+                        [
+                            round(float(value) * scale + offset, digits)
+                            for value in column
+                        ]
+                    )
+            except ValueError:
+                converted.append(Conversion.apply((step,) * len(column), column))
+        return converted
+
     def temperature(self, value, unit):
         if unit.lower() == "imperial":
             # Return value F
@@ -276,10 +753,12 @@ class Conversion:
             high_temp = 26.666666667
             low_temp = 10
 
-        if float(temp) > high_temp:
-            return float(heatindex)
+        if temp is None:
+            return None
+        elif float(temp) > high_temp:
+            return None if heatindex is None else float(heatindex)
         elif float(temp) < low_temp:
-            return float(windchill)
+            return None if windchill is None else float(windchill)
         else:
             return temp
 
@@ -0,0 +1,68 @@
+"""Receiver for data pushed by a Meteobridge "HTTP request" event."""
+import hmac
+import logging
+
+from aiohttp import BasicAuth, hdrs
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.const import HTTP_BAD_REQUEST, HTTP_NOT_FOUND, HTTP_UNAUTHORIZED
+
+from .meteobridge import UnexpectedError
+
+_LOGGER = logging.getLogger(__name__)
+
+PUSH_URL = "/api/mbweather/push/{station}"
+
+
+class MeteobridgePushView(HomeAssistantView):
+    """Accepts the ;-delimited template payload of a station.
+
+    The Logger sends the payload as the data query parameter of a GET, or
+    as the body of a POST, with the station username and password as basic
+    authentication. Each payload refreshes the station coordinator
+    directly, so no poll is made.
+    """
+
+    url = PUSH_URL
+    name = "api:mbweather:push"
+    requires_auth = False
+
+    def __init__(self, stations: dict):
+        """Initialize the view."""
+        self._stations = stations
+
+    async def get(self, request, station):
+        """Handle a payload in the query string."""
+        return await self._async_handle(request, station, request.query.get("data"))
+
+    async def post(self, request, station):
+        """Handle a payload in the body."""
+        return await self._async_handle(request, station, await request.text())
+
+    async def _async_handle(self, request, station, payload):
+        entry = self._stations.get(station)
+        if entry is None or not entry["push"]:
+            return self.json_message("Unknown station", HTTP_NOT_FOUND)
+
+        try:
+            auth = BasicAuth.decode(request.headers.get(hdrs.AUTHORIZATION, ""))
+        except ValueError:
+            auth = None
+        expected = entry["auth"]
+        if (
+            auth is None
+            or auth.login != expected.login
+            or not hmac.compare_digest(auth.password, expected.password)
+        ):
+            return self.json_message("Unauthorized", HTTP_UNAUTHORIZED)
+
+        if not payload:
+            return self.json_message("No data", HTTP_BAD_REQUEST)
+        try:
+            entry["mb"].push(payload)
+        except (UnexpectedError, ValueError) as error:
+            _LOGGER.warning("Invalid data pushed for %s: %s", station, error)
+            return self.json_message("Invalid data", HTTP_BAD_REQUEST)
+
+        await entry["coordinator"].async_refresh()
+        return self.json_message("OK")
@@ -0,0 +1,162 @@
+"""Shared poll scheduler for one or more Meteobridge Loggers."""
+import asyncio
+import logging
+
+from homeassistant import core
+
+from .meteobridge import FIELDS, Conversion
+
+_LOGGER = logging.getLogger(__name__)
+
+# Change between two polls that counts as weather on the move, in metric
+# units: mm/h, m/s and hPa
+ACTIVITY_THRESHOLDS = {
+    "rainrate": 0.0,
+    "windgust": 1.0,
+    "pressure": 0.2,
+}
+
+
+def activity_thresholds(unit_system: str) -> dict:
+    """Return ACTIVITY_THRESHOLDS in the units of unit_system, the units of
+    the data they are compared with. A change only scales, so the offset
+    of a conversion does not apply."""
+    kinds = {key: kind for _, key, kind, _ in FIELDS}
+    plan = Conversion().plan([kinds[key] for key in ACTIVITY_THRESHOLDS], unit_system)
+    return {
+        key: threshold * step[0]
+        for (key, threshold), step in zip(ACTIVITY_THRESHOLDS.items(), plan)
+    }
+
+
+class AdaptiveInterval:
+    """Poll interval that stretches while the readings are steady.
+
+    Every quiet poll multiplies the interval by factor, up to maximum. As
+    soon as one of the watched values moves more than its threshold, or it
+    is raining, the interval snaps back to minimum.
+    """
+
+    def __init__(
+        self, minimum: float, maximum: float, factor: float = 1.5, thresholds=None
+    ):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.interval = minimum
+        self._factor = factor
+        self._thresholds = ACTIVITY_THRESHOLDS if thresholds is None else thresholds
+        self._previous = None
+
+    def update(self, data) -> float:
+        """Return the interval until the next poll, given the latest data."""
+        previous = self._previous
+        self._previous = {key: data.get(key) for key in self._thresholds}
+        if previous is None or self._is_active(previous, self._previous):
+            self.interval = self.minimum
+        else:
+            self.interval = min(self.maximum, self.interval * self._factor)
+        return self.interval
+
+    def _is_active(self, previous, current) -> bool:
+        if current.get("rainrate"):
+            return True
+        for key, threshold in self._thresholds.items():
+            if previous[key] is None or current[key] is None:
+                continue
+            if abs(current[key] - previous[key]) > threshold:
+                return True
+        return False
+
+
+class PollScheduler:
+    """Refreshes a set of coordinators from a single timeline.
+
+    Each station gets a fixed phase within its scan interval, so the
+    requests of many stations are spread evenly instead of all firing on
+    the same tick. A semaphore caps the number of requests in flight.
+    """
+
+    def __init__(self, hass: core.HomeAssistant, max_concurrent: int):
+        self.hass = hass
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._stations = []
+        self._handles = {}
+        self._stopped = False
+        # Loop time the slots of all stations are laid out from
+        self._origin = None
+
+    def wrap(self, update_method):
+        """Return update_method limited to the shared number of requests."""
+
+        async def _limited_update():
+            async with self._semaphore:
+                return await update_method()
+
+        return _limited_update
+
+    def add(
+        self, coordinator, interval, max_interval=None, stats=None, thresholds=None
+    ) -> None:
+        """Add a coordinator to be refreshed every interval. With a
+        max_interval, the interval stretches up to it while data is steady,
+        as judged by thresholds in the units of the data. With stats, the
+        time of every refresh is added to them."""
+        minimum = interval.total_seconds()
+        maximum = minimum if max_interval is None else max_interval.total_seconds()
+        policy = AdaptiveInterval(minimum, maximum, thresholds=thresholds)
+        self._stations.append((coordinator, policy, stats))
+
+    @core.callback
+    def async_start(self, coordinator=None) -> None:
+        """Start refreshing, staggered by station. With a coordinator, start
+        only that one, on its slot of the timeline shared by all, so each
+        station can start as soon as it has its first data."""
+        self._stopped = False
+        now = self.hass.loop.time()
+        if self._origin is None:
+            self._origin = now
+        count = len(self._stations)
+        for index, (station, policy, _) in enumerate(self._stations):
+            if coordinator is not None and station is not coordinator:
+                continue
+            if index in self._handles:
+                continue
+            interval = policy.interval
+            phase = self._origin + interval * index / count
+            # The first slot of the station after now
+            self._schedule(index, phase + interval * ((now - phase) // interval + 1))
+
+    @core.callback
+    def async_stop(self) -> None:
+        """Stop refreshing."""
+        self._stopped = True
+        for handle in self._handles.values():
+            handle.cancel()
+        self._handles.clear()
+
+    def _schedule(self, index, when) -> None:
+        self._handles[index] = self.hass.loop.call_at(when, self._fire, index, when)
+
+    @core.callback
+    def _fire(self, index, when) -> None:
+        self._handles.pop(index, None)
+        self.hass.async_create_task(self._refresh(index, when))
+
+    async def _refresh(self, index, when) -> None:
+        coordinator, policy, stats = self._stations[index]
+        started = self.hass.loop.time()
+        await coordinator.async_refresh()
+        if stats is not None:
+            # Includes waiting for a request slot and updating the entities
+            stats.add("refresh", self.hass.loop.time() - started)
+        interval = policy.interval
+        if coordinator.last_update_success:
+            interval = policy.update(coordinator.data)
+            if interval != policy.minimum:
+                _LOGGER.debug("Polling %s every %.0f s", coordinator.name, interval)
+
+        # Slots are anchored on the previous slot, so a slow poll does not
+        # drift into the slots of other stations
+        next_when = max(when + interval, self.hass.loop.time())
+        if not self._stopped:
+            self._schedule(index, next_when)
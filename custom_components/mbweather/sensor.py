@@ -9,12 +9,10 @@
 """
 import logging
 import voluptuous as vol
-from datetime import timedelta
 
 import homeassistant.helpers.config_validation as cv
 from homeassistant.const import (
     ATTR_ATTRIBUTION,
-    ATTR_FRIENDLY_NAME,
     CONF_MONITORED_CONDITIONS,
     CONF_NAME,
     DEVICE_CLASS_HUMIDITY,
@@ -23,16 +21,18 @@ from homeassistant.const import (
     TEMP_CELSIUS,
     TEMP_FAHRENHEIT,
 )
+from homeassistant.core import callback
 from homeassistant.helpers.config_validation import PLATFORM_SCHEMA
 from homeassistant.helpers.entity import Entity
 from homeassistant.util import slugify
 
-from . import MBDATA
+from . import get_station
 from .const import (
     DOMAIN,
     DEFAULT_ATTRIBUTION,
     ENTITY_ID_SENSOR_FORMAT,
     ENTITY_UNIQUE_ID,
+    CONF_STATION,
     CONF_WIND_UNIT,
     ATTR_UPDATED,
 )
@@ -41,8 +41,6 @@ _LOGGER = logging.getLogger(__name__)
 
 DEPENDENCIES = ["mbweather"]
 
-SCAN_INTERVAL = timedelta(seconds=5)
-
 SENSOR_TYPES = {
     "temperature": [
         "Temperature",
@@ -167,32 +165,134 @@ SENSOR_TYPES = {
         None,
         "in/h",
     ],
+    "windgust_max_10m": [
+        "Wind Gust Max 10 min",
+        "m/s",
+        "mdi:weather-windy",
+        None,
+        "mph",
+    ],
+    "windspeed_avg_10m": [
+        "Wind Speed Avg 10 min",
+        "m/s",
+        "mdi:weather-windy",
+        None,
+        "mph",
+    ],
+    "temp_min_1h": [
+        "Temp Min 1 hour",
+        TEMP_CELSIUS,
+        "mdi:thermometer",
+        DEVICE_CLASS_TEMPERATURE,
+        TEMP_FAHRENHEIT,
+    ],
+    "temp_max_1h": [
+        "Temp Max 1 hour",
+        TEMP_CELSIUS,
+        "mdi:thermometer",
+        DEVICE_CLASS_TEMPERATURE,
+        TEMP_FAHRENHEIT,
+    ],
+    "pressure_trend_1h": ["Pressure Trend 1 hour", "hPa", "mdi:gauge", None, "inHg"],
+    "temp_trend_3h": [
+        "Temp Trend 3 hours",
+        TEMP_CELSIUS,
+        "mdi:thermometer",
+        None,
+        TEMP_FAHRENHEIT,
+    ],
+    "absolute_humidity": ["Absolute Humidity", "g/m³", "mdi:water", None, None],
+    "wetbulb": [
+        "Wet Bulb Temperature",
+        TEMP_CELSIUS,
+        "mdi:thermometer",
+        DEVICE_CLASS_TEMPERATURE,
+        TEMP_FAHRENHEIT,
+    ],
+    "cloud_base": ["Cloud Base", "m", "mdi:weather-cloudy", None, "ft"],
+    "air_density": ["Air Density", "kg/m³", "mdi:weight", None, None],
+    "vapour_pressure_deficit": [
+        "Vapour Pressure Deficit",
+        "kPa",
+        "mdi:water-percent",
+        None,
+        None,
+    ],
+    "beaufort": ["Beaufort", None, "mdi:weather-windy", None, None],
+    "apparent_temperature": [
+        "Apparent Temperature",
+        TEMP_CELSIUS,
+        "mdi:thermometer",
+        DEVICE_CLASS_TEMPERATURE,
+        TEMP_FAHRENHEIT,
+    ],
+    "poll_p50": ["Poll Time Median", "ms", "mdi:timer-outline", None, None],
+    "poll_p95": ["Poll Time 95th Percentile", "ms", "mdi:timer-outline", None, None],
+    "poll_p99": ["Poll Time 99th Percentile", "ms", "mdi:timer-outline", None, None],
+    "poll_errors": ["Poll Errors", None, "mdi:alert-circle-outline", None, None],
+    "bytes_received": ["Bytes Received", "B", "mdi:download-network", None, None],
 }
 
+# Diagnostics of the poll path, only created when monitored explicitly
+DIAGNOSTIC_TYPES = ("poll_p50", "poll_p95", "poll_p99", "poll_errors", "bytes_received")
+
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
-        vol.Required(CONF_MONITORED_CONDITIONS, default=list(SENSOR_TYPES)): vol.All(
-            cv.ensure_list, [vol.In(SENSOR_TYPES)]
-        ),
+        vol.Required(
+            CONF_MONITORED_CONDITIONS,
+            default=[key for key in SENSOR_TYPES if key not in DIAGNOSTIC_TYPES],
+        ): vol.All(cv.ensure_list, [vol.In(SENSOR_TYPES)]),
         vol.Optional(CONF_WIND_UNIT, default="ms"): cv.string,
         vol.Optional(CONF_NAME, default=DOMAIN): cv.string,
+        vol.Optional(CONF_STATION): cv.string,
     }
 )
 
 
+def _to_kmh(value):
+    return round(value * 3.6, 1)
+
+
+class SensorDescription:
+    """Name, unit, icon and device class of a sensor type, resolved once
+    for the unit system and wind unit, and the transform of its value."""
+
+    __slots__ = ("key", "name", "unit", "icon", "device_class", "transform")
+
+    def __init__(self, key, unit_system, wind_unit):
+        name, unit, icon, device_class, imperial_unit = SENSOR_TYPES[key]
+        self.key = key
+        self.name = name
+        self.icon = icon
+        self.device_class = device_class
+        self.transform = None
+        if unit_system == "imperial" and imperial_unit is not None:
+            unit = imperial_unit
+        elif unit == "m/s" and wind_unit == "kmh":
+            unit = "km/h"
+            self.transform = _to_kmh
+        self.unit = unit
+
+
 async def async_setup_platform(hass, config, async_add_entities, _discovery_info=None):
     """Set up the Meteobridge sensor platform."""
-    coordinator = hass.data[MBDATA]["coordinator"]
-    if not coordinator.data:
+    station = get_station(hass, config)
+    if station is None:
         return
+    coordinator = station["coordinator"]
+    mb_server = station["mb"]
 
     unit_system = "metric" if hass.config.units.is_metric else "imperial"
     name = slugify(config.get(CONF_NAME))
     wind_unit = config.get(CONF_WIND_UNIT)
 
+    prefix = config.get(CONF_STATION)
+
     sensors = []
     for sensor in config[CONF_MONITORED_CONDITIONS]:
-        entity = MBWeatherSensor(coordinator, sensor, name, unit_system, wind_unit)
+        entity = MBWeatherSensor(
+            coordinator, mb_server, sensor, name, unit_system, wind_unit, prefix
+        )
         sensors.append(entity)
 
     async_add_entities(sensors, True)
@@ -201,22 +301,34 @@ async def async_setup_platform(hass, config, async_add_entities, _discovery_info
 class MBWeatherSensor(Entity):
     """ Implementation of a SmartWeather Weatherflow Current Sensor. """
 
-    def __init__(self, coordinator, sensor, name, unit_system, wind_unit):
+    def __init__(
+        self, coordinator, mb_server, sensor, name, unit_system, wind_unit, prefix=None
+    ):
         """Initialize the sensor."""
         self.coordinator = coordinator
+        self._mb = mb_server
         self._sensor = sensor
-        self._unit_system = unit_system
-        self._wind_unit = wind_unit
-        self._state = None
-        self.entity_id = ENTITY_ID_SENSOR_FORMAT.format(self._sensor)
-        self._name = SENSOR_TYPES[self._sensor][0]
-        self._unique_id = ENTITY_UNIQUE_ID.format(slugify(self._name).replace(" ", "_"))
+        self._description = SensorDescription(sensor, unit_system, wind_unit)
+        self._name = self._description.name
+        object_id = self._sensor
+        unique_id = slugify(self._name).replace(" ", "_")
+        if prefix is not None:
+            object_id = f"{slugify(prefix)}_{object_id}"
+            unique_id = f"{slugify(prefix)}_{unique_id}"
+        self.entity_id = ENTITY_ID_SENSOR_FORMAT.format(object_id)
+        self._unique_id = ENTITY_UNIQUE_ID.format(unique_id)
+        self._available = False
 
     @property
     def unique_id(self):
         """Return a unique ID."""
         return self._unique_id
 
+    @property
+    def should_poll(self):
+        """Return False, updates are pushed by the coordinator."""
+        return False
+
     @property
     def name(self):
         """Return the name of the sensor."""
@@ -225,59 +337,59 @@ class MBWeatherSensor(Entity):
     @property
     def state(self):
         """Return the state of the sensor."""
-        if self._sensor in self.coordinator.data:
-            if not (self.coordinator.data[self._sensor] is None):
-                self._state = self.coordinator.data[self._sensor]
-                if SENSOR_TYPES[self._sensor][1] == "m/s":
-                    return (
-                        round(self._state * 3.6, 1)
-                        if self._wind_unit == "kmh"
-                        else self._state
-                    )
-                else:
-                    return self._state
-        return None
+        value = self._mb.sensor_data.get(self._sensor)
+        transform = self._description.transform
+        if value is None or transform is None:
+            return value
+        return transform(value)
 
     @property
     def unit_of_measurement(self):
         """Return the unit of measurement."""
-        if self._unit_system == "imperial" and not (
-            SENSOR_TYPES[self._sensor][4] is None
-        ):
-            return SENSOR_TYPES[self._sensor][4]
-        else:
-            if SENSOR_TYPES[self._sensor][1] == "m/s":
-                return (
-                    "km/h"
-                    if self._wind_unit == "kmh"
-                    else SENSOR_TYPES[self._sensor][1]
-                )
-            else:
-                return SENSOR_TYPES[self._sensor][1]
+        return self._description.unit
 
     @property
     def icon(self):
         """Icon to use in the frontend."""
-        return SENSOR_TYPES[self._sensor][2]
+        return self._description.icon
 
     @property
     def device_class(self):
         """Return the device class of the sensor."""
-        return SENSOR_TYPES[self._sensor][3]
+        return self._description.device_class
 
     @property
     def device_state_attributes(self):
         """Return the state attributes of the device."""
         attr = {}
         attr[ATTR_ATTRIBUTION] = DEFAULT_ATTRIBUTION
-        attr[ATTR_UPDATED] = self.coordinator.data["time"]
+        attr[ATTR_UPDATED] = self._mb.sensor_data.get("time")
 
         return attr
 
+    @property
+    def available(self):
+        """Return False until the first data, while the Logger cannot be
+        reached, and while it sends no valid value for this sensor."""
+        return (
+            self._mb.last_update is not None
+            and self.coordinator.last_update_success
+            and self._sensor not in self._mb.invalid
+        )
+
+    @callback
+    def _async_update_state(self):
+        """Write the state if the value or availability of this sensor
+        changed."""
+        available = self.available
+        if self._sensor in self._mb.changed or available != self._available:
+            self._available = available
+            self.async_write_ha_state()
+
     async def async_added_to_hass(self):
         """When entity is added to hass."""
-        self.coordinator.async_add_listener(self.async_write_ha_state)
+        self.coordinator.async_add_listener(self._async_update_state)
 
     async def async_will_remove_from_hass(self):
         """When entity will be removed from hass."""
-        self.coordinator.async_remove_listener(self.async_write_ha_state)
+        self.coordinator.async_remove_listener(self._async_update_state)
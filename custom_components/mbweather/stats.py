@@ -0,0 +1,93 @@
+"""Lightweight timing and traffic statistics of the Meteobridge poll path."""
+from bisect import bisect_left
+
+# Upper bounds in seconds of the histogram buckets. The last one catches all.
+BUCKETS = (
+    0.0005,
+    0.001,
+    0.002,
+    0.005,
+    0.01,
+    0.02,
+    0.05,
+    0.1,
+    0.2,
+    0.5,
+    1.0,
+    2.0,
+    5.0,
+    10.0,
+    float("inf"),
+)
+
+# Stages of a poll that are timed
+STAGES = ("connect", "response", "decode", "convert", "poll", "refresh")
+
+
+class Histogram:
+    """Counts durations in the fixed BUCKETS."""
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, percent: float):
+        """Return the upper bound of the bucket holding the percentile, or
+        None without samples. The last bucket reports the mean instead."""
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound if bound != BUCKETS[-1] else self.total / self.count
+        return None
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "buckets": {
+                str(bound): count for bound, count in zip(BUCKETS, self.counts) if count
+            },
+        }
+
+
+class PollStats:
+    """Per stage latency histograms, error and traffic counters of a Logger."""
+
+    def __init__(self):
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.errors = 0
+        self.bytes_received = 0
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage].add(seconds)
+
+    def sensor_data(self) -> dict:
+        """Return the values of the diagnostic sensors, latencies in ms."""
+        poll = self.stages["poll"]
+        data = {}
+        for percent in (50, 95, 99):
+            value = poll.percentile(percent)
+            data[f"poll_p{percent}"] = None if value is None else round(value * 1000)
+        data["poll_errors"] = self.errors
+        data["bytes_received"] = self.bytes_received
+        return data
+
+    def as_dict(self) -> dict:
+        """Return all statistics, for a debug dump."""
+        return {
+            "errors": self.errors,
+            "bytes_received": self.bytes_received,
+            "stages": {stage: hist.as_dict() for stage, hist in self.stages.items()},
+        }
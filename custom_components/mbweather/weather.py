@@ -5,11 +5,11 @@
    Home Assistant, where most of the Current Data from Dark Sky is
    replaced with Realtime data from the local Weather Station
 """
+import asyncio
 from datetime import timedelta
 import logging
 
-import forecastio
-from requests.exceptions import ConnectionError as ConnectError, HTTPError, Timeout
+import aiohttp
 import voluptuous as vol
 
 from homeassistant.components.weather import (
@@ -31,13 +31,16 @@ from homeassistant.const import (
     TEMP_CELSIUS,
     TEMP_FAHRENHEIT,
 )
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import homeassistant.helpers.config_validation as cv
 from homeassistant.util import Throttle
 from homeassistant.util import slugify
 from homeassistant.util.dt import utc_from_timestamp
 
-from . import MBDATA, WeatherEntityExt
+from . import WeatherEntityExt, get_station
 from .const import (
+    CONF_STATION,
     ENTITY_ID_WEATHER_FORMAT,
     ENTITY_UNIQUE_ID,
 )
@@ -81,17 +84,37 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
         vol.Optional(CONF_UNITS): vol.In(["auto", "si", "us", "ca", "uk", "uk2"]),
         vol.Optional(CONF_LANGUAGE, default=DEFAULT_LANGUAGE): cv.string,
         vol.Optional(CONF_NAME, default=DEFAULT_NAME): cv.string,
+        vol.Optional(CONF_STATION): cv.string,
     }
 )
 
 MIN_TIME_BETWEEN_UPDATES = timedelta(minutes=3)
 
+DARK_SKY_URL = "https://api.darksky.net"
+DARK_SKY_PATH = "/forecast/{}/{},{}"
+# Sections of the Dark Sky response that are not used
+DARK_SKY_EXCLUDE = "minutely,alerts"
+DARK_SKY_TIMEOUT = 10
+
+# Meteobridge values shown by the weather entity
+STATION_KEYS = (
+    "temperature",
+    "humidity",
+    "windspeedavg",
+    "windbearing",
+    "raintoday",
+    "rainrate",
+    "pressure",
+)
+
 
 async def async_setup_platform(hass, config, async_add_entities, _discovery_info=None):
     """Set up the Dark Sky weather."""
-    coordinator = hass.data[MBDATA]["coordinator"]
-    if not coordinator.data:
+    station = get_station(hass, config)
+    if station is None:
         return
+    coordinator = station["coordinator"]
+    mb_server = station["mb"]
 
     latitude = config.get(CONF_LATITUDE, hass.config.latitude)
     longitude = config.get(CONF_LONGITUDE, hass.config.longitude)
@@ -104,15 +127,22 @@ async def async_setup_platform(hass, config, async_add_entities, _discovery_info
         units = "ca" if hass.config.units.is_metric else "us"
 
     dark_sky = DarkSkyData(
-        config.get(CONF_API_KEY), latitude, longitude, language, units
+        async_get_clientsession(hass),
+        config.get(CONF_API_KEY),
+        latitude,
+        longitude,
+        language,
+        units,
+    )
+    async_add_entities(
+        [DarkSkyWeather(name, dark_sky, mode, coordinator, mb_server)], True
     )
-    async_add_entities([DarkSkyWeather(name, dark_sky, mode, coordinator)], True)
 
 
 class DarkSkyWeather(WeatherEntityExt):
     """Representation of a weather condition."""
 
-    def __init__(self, name, dark_sky, mode, coordinator):
+    def __init__(self, name, dark_sky, mode, coordinator, mb_server):
         """Initialize Dark Sky weather."""
         self._name = name
         self._dark_sky = dark_sky
@@ -122,7 +152,9 @@ class DarkSkyWeather(WeatherEntityExt):
         self._ds_currently = None
         self._ds_hourly = None
         self._ds_daily = None
+        self._forecast = None
         self.coordinator = coordinator
+        self._mb = mb_server
         self.entity_id = ENTITY_ID_WEATHER_FORMAT.format(
             slugify(self._name).replace(" ", "_")
         )
@@ -130,8 +162,9 @@ class DarkSkyWeather(WeatherEntityExt):
 
     @property
     def available(self):
-        """Return if weather data is available from Dark Sky."""
-        return self._ds_data is not None
+        """Return if weather data is available from Dark Sky and the
+        station."""
+        return self._ds_data is not None and self._mb.last_update is not None
 
     @property
     def attribution(self):
@@ -146,7 +179,7 @@ class DarkSkyWeather(WeatherEntityExt):
     @property
     def temperature(self):
         """Return the temperature."""
-        return float(self.coordinator.data["temperature"])
+        return self._station_float("temperature")
 
     @property
     def temperature_unit(self):
@@ -158,31 +191,31 @@ class DarkSkyWeather(WeatherEntityExt):
     @property
     def humidity(self):
         """Return the humidity."""
-        return int(float(self.coordinator.data["humidity"]))
+        humidity = self._station_float("humidity")
+        return None if humidity is None else int(humidity)
 
     @property
     def wind_speed(self):
         """Return the wind speed."""
-        return (
-            float(self.coordinator.data["windspeedavg"])
-            if "us" in self._dark_sky.units
-            else round(float(self.coordinator.data["windspeedavg"]) * 3.6, 1)
-        )
+        wind_speed = self._station_float("windspeedavg")
+        if wind_speed is None or "us" in self._dark_sky.units:
+            return wind_speed
+        return round(wind_speed * 3.6, 1)
 
     @property
     def wind_bearing(self):
         """Return the wind bearing."""
-        return float(self.coordinator.data["windbearing"])
+        return self._station_float("windbearing")
 
     @property
     def rain_today(self):
         """Return the accumulated precipitation."""
-        return float(self.coordinator.data["raintoday"])
+        return self._station_float("raintoday")
 
     @property
     def rain_rate(self):
         """Return the current rain rate."""
-        return float(self.coordinator.data["rainrate"])
+        return self._station_float("rainrate")
 
     @property
     def precip_probability(self):
@@ -199,7 +232,8 @@ class DarkSkyWeather(WeatherEntityExt):
     @property
     def pressure(self):
         """Return the pressure."""
-        return round(float(self.coordinator.data["pressure"]), 1)
+        pressure = self._station_float("pressure")
+        return None if pressure is None else round(pressure, 1)
 
     @property
     def visibility(self):
@@ -217,6 +251,10 @@ class DarkSkyWeather(WeatherEntityExt):
     @property
     def forecast(self):
         """Return the forecast array."""
+        return self._forecast
+
+    def _build_forecast(self):
+        """Build the forecast array from the latest Dark Sky data."""
         # Per conversation with Joshua Reyes of Dark Sky, to get the total
         # forecasted precipitation, you have to multiple the intensity by
         # the hours for the forecast interval
@@ -232,61 +270,93 @@ class DarkSkyWeather(WeatherEntityExt):
             data = [
                 {
                     ATTR_FORECAST_TIME: utc_from_timestamp(
-                        entry.d.get("time")
+                        entry.get("time")
                     ).isoformat(),
-                    ATTR_FORECAST_TEMP: entry.d.get("temperatureHigh"),
-                    ATTR_FORECAST_TEMP_LOW: entry.d.get("temperatureLow"),
+                    ATTR_FORECAST_TEMP: entry.get("temperatureHigh"),
+                    ATTR_FORECAST_TEMP_LOW: entry.get("temperatureLow"),
                     ATTR_FORECAST_PRECIPITATION: calc_precipitation(
-                        entry.d.get("precipIntensity"), 24
+                        entry.get("precipIntensity"), 24
                     ),
-                    ATTR_FORECAST_WIND_SPEED: entry.d.get("windSpeed"),
-                    ATTR_FORECAST_WIND_BEARING: entry.d.get("windBearing"),
-                    ATTR_FORECAST_CONDITION: MAP_CONDITION.get(entry.d.get("icon")),
+                    ATTR_FORECAST_WIND_SPEED: entry.get("windSpeed"),
+                    ATTR_FORECAST_WIND_BEARING: entry.get("windBearing"),
+                    ATTR_FORECAST_CONDITION: MAP_CONDITION.get(entry.get("icon")),
                 }
-                for entry in self._ds_daily.data
+                for entry in self._ds_daily
             ]
         else:
             data = [
                 {
                     ATTR_FORECAST_TIME: utc_from_timestamp(
-                        entry.d.get("time")
+                        entry.get("time")
                     ).isoformat(),
-                    ATTR_FORECAST_TEMP: entry.d.get("temperature"),
+                    ATTR_FORECAST_TEMP: entry.get("temperature"),
                     ATTR_FORECAST_PRECIPITATION: calc_precipitation(
-                        entry.d.get("precipIntensity"), 1
+                        entry.get("precipIntensity"), 1
                     ),
-                    ATTR_FORECAST_CONDITION: MAP_CONDITION.get(entry.d.get("icon")),
+                    ATTR_FORECAST_CONDITION: MAP_CONDITION.get(entry.get("icon")),
                 }
-                for entry in self._ds_hourly.data
+                for entry in self._ds_hourly
             ]
 
         return data
 
-    def update(self):
+    def _station_float(self, key):
+        """Return a value of the station as a float, None while invalid."""
+        value = self.coordinator.data[key]
+        return None if value is None else float(value)
+
+    async def async_update(self):
         """Get the latest data from Dark Sky."""
-        self._dark_sky.update()
+        await self._dark_sky.async_update()
+        if self._dark_sky.data is self._ds_data:
+            return
 
         self._ds_data = self._dark_sky.data
-        currently = self._dark_sky.currently
-        self._ds_currently = currently.d if currently else {}
+        self._ds_currently = self._dark_sky.currently or {}
         self._ds_hourly = self._dark_sky.hourly
         self._ds_daily = self._dark_sky.daily
+        # The forecast only changes with new Dark Sky data, so build it once
+        self._forecast = None if self._ds_data is None else self._build_forecast()
+
+    @callback
+    def _async_update_state(self):
+        """Write the state if any of the station values shown changed."""
+        if not self._mb.changed.isdisjoint(STATION_KEYS):
+            self.async_write_ha_state()
 
     async def async_added_to_hass(self):
         """When entity is added to hass."""
-        self.coordinator.async_add_listener(self.async_write_ha_state)
+        self.coordinator.async_add_listener(self._async_update_state)
 
     async def async_will_remove_from_hass(self):
         """When entity will be removed from hass."""
-        self.coordinator.async_remove_listener(self.async_write_ha_state)
+        self.coordinator.async_remove_listener(self._async_update_state)
 
 
 class DarkSkyData:
     """Get the latest data from Dark Sky."""
 
-    def __init__(self, api_key, latitude, longitude, language, units):
-        """Initialize the data object."""
-        self._api_key = api_key
+    def __init__(
+        self,
+        session,
+        api_key,
+        latitude,
+        longitude,
+        language,
+        units,
+        url=DARK_SKY_URL,
+        timeout=DARK_SKY_TIMEOUT,
+    ):
+        """Initialize the data object. The url and timeout of the Dark Sky
+        API can be replaced, as by tests."""
+        self._session = session
+        self._url = url + DARK_SKY_PATH.format(api_key, latitude, longitude)
+        self._params = {
+            "units": units,
+            "lang": language,
+            "exclude": DARK_SKY_EXCLUDE,
+        }
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
         self.latitude = latitude
         self.longitude = longitude
         self.requested_units = units
@@ -298,27 +368,27 @@ class DarkSkyData:
         self.daily = None
 
     @Throttle(MIN_TIME_BETWEEN_UPDATES)
-    def update(self):
+    async def async_update(self):
         """Get the latest data from Dark Sky."""
         try:
-            self.data = forecastio.load_forecast(
-                self._api_key,
-                self.latitude,
-                self.longitude,
-                lang=self.language,
-                units=self.requested_units,
-            )
-            self.currently = self.data.currently()
-            self.hourly = self.data.hourly()
-            self.daily = self.data.daily()
-            _LOGGER.debug("FORECAST UPDATED - DarkSky")
-        except (ConnectError, HTTPError, Timeout, ValueError) as error:
+            async with self._session.get(
+                self._url, params=self._params, timeout=self._timeout
+            ) as response:
+                response.raise_for_status()
+                self.data = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as error:
             _LOGGER.error("Unable to connect to Dark Sky. %s", error)
             self.data = None
+            return
+
+        self.currently = self.data.get("currently", {})
+        self.hourly = self.data.get("hourly", {}).get("data", [])
+        self.daily = self.data.get("daily", {}).get("data", [])
+        _LOGGER.debug("FORECAST UPDATED - DarkSky")
 
     @property
     def units(self):
         """Get the unit system of returned data."""
         if self.data is None:
             return None
-        return self.data.json.get("flags").get("units")
+        return self.data.get("flags", {}).get("units")
@@ -0,0 +1,59 @@
+"""Fixtures of the mbweather tests."""
+import asyncio
+import time
+
+import pytest
+
+from homeassistant import core
+from homeassistant.util.unit_system import IMPERIAL_SYSTEM, METRIC_SYSTEM
+
+from custom_components.mbweather.meteobridge import Meteobridge
+
+from .simulator import PASSWORD, USERNAME, MeteobridgeSimulator
+
+
+@pytest.fixture
+async def hass(tmp_path):
+    """A running Home Assistant, configured in tmp_path."""
+    hass = core.HomeAssistant()
+    hass.config.config_dir = str(tmp_path)
+    hass.config.units = METRIC_SYSTEM
+    hass.state = core.CoreState.running
+    # Set when stopped, instead of stopping the event loop of the test
+    hass._stopped = asyncio.Event()
+    yield hass
+    await hass.async_stop(force=True)
+
+
+@pytest.fixture
+def host_time_zone(monkeypatch):
+    """A host time zone other than the one of the simulated Logger."""
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.fixture
+def imperial(hass):
+    """Home Assistant set up for imperial units."""
+    hass.config.units = IMPERIAL_SYSTEM
+    return hass
+
+
+@pytest.fixture
+async def simulator():
+    """A simulated Logger, serving on a free local port."""
+    simulator = MeteobridgeSimulator()
+    await simulator.start()
+    yield simulator
+    await simulator.close()
+
+
+@pytest.fixture
+async def client(simulator):
+    """A Meteobridge polling the simulated Logger in metric units."""
+    client = Meteobridge(None, simulator.host, USERNAME, PASSWORD, "metric")
+    yield client
+    await client.close()
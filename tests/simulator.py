@@ -0,0 +1,368 @@
+"""Local stand-in for a Meteobridge Logger, for the tests and benchmarks.
+
+MeteobridgeSimulator serves /cgi-bin/template.cgi as a Logger does: every
+[tag] of the template query parameter is replaced by a value of a
+reproducible WeatherSeries, with its default where the series has none.
+"""
+import asyncio
+import calendar
+import math
+import random
+import re
+import time
+from collections import deque
+
+from aiohttp import BasicAuth, hdrs, web
+
+# 1 June 2026 00:00 UTC, the default start of a series
+START = calendar.timegm((2026, 6, 1, 0, 0, 0))
+
+USERNAME = "meteobridge"
+PASSWORD = "secret"
+
+# Time tags, Logger local time unless prefixed with U for UTC
+TIME_TAGS = {
+    "YYYY": "%Y",
+    "MM": "%m",
+    "DD": "%d",
+    "hh": "%H",
+    "mm": "%M",
+    "ss": "%S",
+}
+
+_TAG = re.compile(r"\[([^\[\]]*)\]")
+_DECIMALS = re.compile(r"^(.*-[a-z]+\d*)\.(\d)$")
+
+
+class WeatherSeries:
+    """Reproducible weather at a station, one sample per step seconds.
+
+    Temperature follows a daily cycle, pressure wanders slowly, the wind is
+    gusty and stronger in the afternoon, and every few hours a shower passes,
+    cooling the air and dropping the pressure. values holds the current
+    sample as metric values by Meteobridge sensor and aggregate, as in
+    th0temp-act, including the daily, monthly and yearly extremes.
+    """
+
+    def __init__(self, seed: int = 0, start: float = START, step: float = 10.0):
+        self._random = random.Random(seed)
+        self.step = step
+        self.time = start
+        self._noise = 0.0
+        self._pressure = 1013.0
+        self._pressure_drift = 0.0
+        self._wind = 3.0
+        self._avgwind = 3.0
+        self._gusts = deque(maxlen=max(1, int(60 / step)))
+        self._bearing = 240.0
+        self._shower = 0
+        self._rainrate = 0.0
+        self._day = None
+        self._extremes = {
+            "th0temp-mmin": 4.2,
+            "th0temp-mmax": 24.8,
+            "th0temp-ymin": -11.6,
+            "th0temp-ymax": 29.3,
+            "wind0wind-mmax": 14.2,
+            "wind0wind-ymax": 23.5,
+            "rain0total-mmax": 18.4,
+            "rain0total-ymax": 341.7,
+            "rain0rate-mmax": 22.0,
+            "rain0rate-ymax": 48.6,
+        }
+        self.values = {}
+        self._sample()
+
+    def advance(self, count: int = 1) -> dict:
+        """Move count steps ahead, and return the values of the last."""
+        for _ in range(count):
+            self.time += self.step
+            self._sample()
+        return self.values
+
+    def _sample(self) -> None:
+        rnd = self._random
+        hours = (self.time % 86400) / 3600
+        day = int(self.time // 86400)
+
+        # A shower starts about every 8 hours, and lasts 10 to 40 minutes
+        if self._shower:
+            self._shower -= 1
+            self._rainrate = max(0.2, self._rainrate + rnd.gauss(0, 0.6))
+        elif rnd.random() < self.step / (8 * 3600):
+            self._shower = int(rnd.uniform(600, 2400) / self.step)
+            self._rainrate = rnd.uniform(0.5, 6.0)
+        else:
+            self._rainrate = 0.0
+        raining = self._rainrate > 0
+
+        self._noise = 0.98 * self._noise + rnd.gauss(0, 0.05)
+        temperature = 14 + 6 * math.sin(2 * math.pi * (hours - 9) / 24) + self._noise
+        if raining:
+            temperature -= 2.5
+        humidity = min(100.0, max(25.0, 80 - 3 * (temperature - 12) + 15 * raining))
+
+        self._pressure_drift = 0.999 * self._pressure_drift + rnd.gauss(0, 0.0001)
+        self._pressure += self._pressure_drift - 0.01 * raining
+        self._pressure += 0.001 * (1013 - self._pressure)
+
+        target = 2.5 + 2 * math.sin(2 * math.pi * (hours - 10) / 24) + 3 * raining
+        self._wind += 0.05 * (target - self._wind) + rnd.gauss(0, 0.15)
+        self._wind = max(0.0, self._wind)
+        windspeed = max(0.0, self._wind + rnd.gauss(0, 0.4))
+        # The gust is the highest 3 second wind of the last minute
+        self._gusts.append(windspeed * (1 + abs(rnd.gauss(0, 0.2))))
+        windgust = max(self._gusts)
+        self._avgwind += 0.1 * (windspeed - self._avgwind)
+        self._bearing = (self._bearing + rnd.gauss(0, 4)) % 360
+
+        sun = max(0.0, math.sin(math.pi * (hours - 6) / 12))
+        solar = 850 * sun * (0.25 if raining else 1.0)
+
+        values = self.values
+        if day != self._day:
+            self._day = day
+            values["th0temp-dmax"] = values["th0temp-dmin"] = temperature
+            values["rain0total-daysum"] = 0.0
+        values["th0temp-act"] = temperature
+        values["th0temp-dmax"] = max(values["th0temp-dmax"], temperature)
+        values["th0temp-dmin"] = min(values["th0temp-dmin"], temperature)
+        values["th0hum-act"] = humidity
+        values["th0dew-act"] = _dewpoint(temperature, humidity)
+        values["th0heatindex-act"] = _heat_index(temperature, humidity)
+        values["wind0chill-act"] = _wind_chill(temperature, windspeed)
+        values["th0lowbat-act"] = 0
+        values["thb0seapress-act"] = self._pressure
+        values["thb0temp-act"] = 21.5 + 0.5 * math.sin(2 * math.pi * hours / 24)
+        values["thb0hum-act"] = 45.0
+        values["wind0wind-act"] = windspeed
+        values["wind0wind-max1"] = windgust
+        values["wind0avgwind-act"] = self._avgwind
+        values["wind0dir-avg5"] = self._bearing
+        values["rain0rate-act"] = self._rainrate
+        values["rain0total-daysum"] += self._rainrate * self.step / 3600
+        values["uv0index-act"] = round(solar / 100, 1)
+        values["sol0rad-act"] = solar
+        values["forecast-text"] = (
+            "Increasing clouds; precipitation possible within 12 hours"
+            if self._pressure_drift < 0
+            else "Mostly clear; little temperature change"
+        )
+
+        extremes = self._extremes
+        for period in ("m", "y"):
+            extremes[f"th0temp-{period}min"] = min(
+                extremes[f"th0temp-{period}min"], temperature
+            )
+            extremes[f"th0temp-{period}max"] = max(
+                extremes[f"th0temp-{period}max"], temperature
+            )
+            extremes[f"wind0wind-{period}max"] = max(
+                extremes[f"wind0wind-{period}max"], windgust
+            )
+            extremes[f"rain0total-{period}max"] += self._rainrate * self.step / 3600
+            extremes[f"rain0rate-{period}max"] = max(
+                extremes[f"rain0rate-{period}max"], self._rainrate
+            )
+        values.update(extremes)
+
+
+class MeteobridgeSimulator:
+    """A local aiohttp server answering template requests like a Logger.
+
+    Each request advances the series one step, unless advance is False.
+    The Logger clock runs utc_offset seconds ahead of UTC. Every answer
+    waits delay seconds. Tests can set status to answer with an error, and
+    missing to the sensors, as in th0hum-act, that have no value. With history, a
+    request with from and to parameters is answered with every sample
+    taken in that period, one row each.
+    """
+
+    def __init__(
+        self,
+        series: WeatherSeries = None,
+        username: str = USERNAME,
+        password: str = PASSWORD,
+        utc_offset: int = 7200,
+        history: bool = False,
+        advance: bool = True,
+        delay: float = 0.0,
+    ):
+        self.series = WeatherSeries() if series is None else series
+        self.username = username
+        self.password = password
+        self.utc_offset = utc_offset
+        self.history = history
+        self.advance_on_request = advance
+        self.delay = delay
+        self.status = 200
+        self.missing = set()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.templates = []
+        # Transports are kept, so a closed connection cannot hand its id on
+        self._transports = set()
+        self._samples = deque([(self.series.time, dict(self.series.values))], 100000)
+        self._compiled = {}
+        self._auth = BasicAuth(username, password).encode()
+        self._runner = None
+        self.port = None
+
+    @property
+    def host(self) -> str:
+        """The host and port to configure as the Logger host."""
+        return f"127.0.0.1:{self.port}"
+
+    @property
+    def connections(self) -> int:
+        """Number of connections made to the simulator."""
+        return len(self._transports)
+
+    async def start(self) -> None:
+        """Start serving on a free port of 127.0.0.1."""
+        app = web.Application()
+        app.router.add_get("/cgi-bin/template.cgi", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def advance(self, count: int = 1) -> None:
+        """Move the series count steps ahead, as if time passed."""
+        for _ in range(count):
+            self.series.advance()
+            self._samples.append((self.series.time, dict(self.series.values)))
+
+    def render(self, template: str, when: float = None, values: dict = None) -> str:
+        """Return the template filled in with the sample at when, by default
+        the current one."""
+        if when is None:
+            when = self.series.time
+        if values is None:
+            values = self.series.values
+        parts = self._compiled.get(template)
+        if parts is None:
+            parts = self._compiled[template] = _compile(template)
+        local = time.gmtime(when + self.utc_offset)
+        utc = time.gmtime(when)
+        missing = self.missing
+        text = []
+        for literal, name, decimals, default in parts:
+            text.append(literal)
+            if name is None:
+                continue
+            if name in TIME_TAGS:
+                text.append(time.strftime(TIME_TAGS[name], local))
+            elif name[0] == "U" and name[1:] in TIME_TAGS:
+                text.append(time.strftime(TIME_TAGS[name[1:]], utc))
+            elif name == "epoch":
+                text.append(str(int(when)))
+            else:
+                value = None if name in missing else values.get(name)
+                if value is None:
+                    text.append(default)
+                elif isinstance(value, str):
+                    text.append(value)
+                else:
+                    text.append(f"{value:.{decimals}f}")
+        return "".join(text)
+
+    def payload(self, template: str) -> str:
+        """Advance one step, and return the template filled in, as a Logger
+        pushing its data would send it."""
+        self.advance()
+        return self.render(template)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self._transports.add(request.transport)
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if request.headers.get(hdrs.AUTHORIZATION) != self._auth:
+                return web.Response(status=401, text="Unauthorized")
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            if self.status != 200:
+                return web.Response(status=self.status, text="Error")
+
+            template = request.query.get("template", "")
+            self.templates.append(template)
+            if self.history and "from" in request.query and "to" in request.query:
+                return web.Response(text=self._history(template, request.query))
+            if self.advance_on_request:
+                self.advance()
+            return web.Response(text=self.render(template))
+        finally:
+            self.in_flight -= 1
+
+    def _history(self, template, query) -> str:
+        """Render every sample between the from and to Logger times."""
+        start = calendar.timegm(time.strptime(query["from"], "%Y%m%d%H%M%S"))
+        end = calendar.timegm(time.strptime(query["to"], "%Y%m%d%H%M%S"))
+        start -= self.utc_offset
+        end -= self.utc_offset
+        return "\n".join(
+            self.render(template, when, values)
+            for when, values in self._samples
+            if start <= when <= end
+        )
+
+
+def _compile(template: str) -> list:
+    """Split a template into (literal, tag name, decimals, default) parts."""
+    parts = []
+    position = 0
+    for match in _TAG.finditer(template):
+        name, _, default = match.group(1).partition(":")
+        decimals = 1
+        found = _DECIMALS.match(name)
+        if found:
+            name, decimals = found.group(1), int(found.group(2))
+        parts.append((template[position : match.start()], name, decimals, default))
+        position = match.end()
+    parts.append((template[position:], None, None, None))
+    return parts
+
+
+def _dewpoint(temperature: float, humidity: float) -> float:
+    gamma = math.log(humidity / 100) + 17.62 * temperature / (243.12 + temperature)
+    return 243.12 * gamma / (17.62 - gamma)
+
+
+def _heat_index(temperature: float, humidity: float) -> float:
+    if temperature < 26.7:
+        return temperature
+    fahrenheit = temperature * 1.8 + 32
+    index = (
+        -42.379
+        + 2.04901523 * fahrenheit
+        + 10.14333127 * humidity
+        - 0.22475541 * fahrenheit * humidity
+        - 0.00683783 * fahrenheit ** 2
+        - 0.05481717 * humidity ** 2
+        + 0.00122874 * fahrenheit ** 2 * humidity
+        + 0.00085282 * fahrenheit * humidity ** 2
+        - 0.00000199 * fahrenheit ** 2 * humidity ** 2
+    )
+    return (index - 32) / 1.8
+
+
+def _wind_chill(temperature: float, windspeed: float) -> float:
+    kmh = windspeed * 3.6
+    if temperature > 10 or kmh < 4.8:
+        return temperature
+    return (
+        13.12
+        + 0.6215 * temperature
+        - 11.37 * kmh ** 0.16
+        + 0.3965 * temperature * kmh ** 0.16
+    )
@@ -0,0 +1,77 @@
+"""Tests of the rolling window aggregates."""
+from custom_components.mbweather.aggregates import (
+    RollingAggregates,
+    RollingAvg,
+    RollingMax,
+    RollingMin,
+    RollingTrend,
+)
+
+
+def test_max_drops_samples_leaving_window():
+    """The maximum forgets samples once they are window seconds old."""
+    window = RollingMax(10)
+
+    assert window.add(0, 5.0) == 5.0
+    assert window.add(5, 3.0) == 5.0
+    assert window.add(9, 4.0) == 5.0
+    assert window.add(10, 2.0) == 4.0
+    assert window.add(19, 1.0) == 2.0
+    assert window.add(30, 0.5) == 0.5
+
+
+def test_min_drops_samples_leaving_window():
+    """The minimum forgets samples once they are window seconds old."""
+    window = RollingMin(10)
+
+    assert window.add(0, 1.0) == 1.0
+    assert window.add(5, 3.0) == 1.0
+    assert window.add(9, 2.0) == 1.0
+    assert window.add(10, 4.0) == 2.0
+    assert window.add(25, 6.0) == 6.0
+
+
+def test_avg_of_samples_within_window():
+    """The average covers the samples of the last window seconds only."""
+    window = RollingAvg(10)
+
+    assert window.add(0, 2.0) == 2.0
+    assert window.add(4, 4.0) == 3.0
+    assert window.add(8, 6.0) == 4.0
+    assert window.add(10, 8.0) == 6.0
+    assert window.add(30, 1.0) == 1.0
+
+
+def test_trend_from_oldest_sample_within_window():
+    """The trend is the change since the oldest sample in the window."""
+    window = RollingTrend(10)
+
+    assert window.add(0, 1000.0) == 0.0
+    assert window.add(5, 1001.5) == 1.5
+    assert window.add(10, 1002.0) == 0.5
+
+
+def test_missing_source_keeps_previous_value():
+    """A sample without a source value leaves its aggregates as they were,
+    while the aggregates of other sources go on."""
+    aggregates = RollingAggregates(
+        (
+            ("temp_min", "temperature", "min", 60, 1),
+            ("gust_max", "windgust", "max", 60, 1),
+        )
+    )
+
+    aggregates.add(0, {"temperature": 10.0, "windgust": 5.0})
+    result = aggregates.add(10, {"temperature": None, "windgust": 7.0})
+
+    assert result == {"temp_min": 10.0, "gust_max": 7.0}
+    result = aggregates.add(20, {"windgust": 6.0})
+    assert result == {"temp_min": 10.0, "gust_max": 7.0}
+
+
+def test_aggregate_without_samples_is_none():
+    """An aggregate is None until its source has had a value."""
+    aggregates = RollingAggregates((("temp_min", "temperature", "min", 60, 1),))
+
+    assert aggregates.add(0, {"temperature": None}) == {"temp_min": None}
+    assert aggregates.add(10, {"temperature": 9.04}) == {"temp_min": 9.0}
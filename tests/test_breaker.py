@@ -0,0 +1,92 @@
+"""Tests of the circuit breaker of the Logger requests."""
+import asyncio
+import logging
+import time
+
+import pytest
+
+from custom_components.mbweather.breaker import CircuitBreaker
+from custom_components.mbweather.meteobridge import CircuitOpenError, UnexpectedError
+
+
+def test_backoff_doubles_up_to_maximum():
+    """The circuit opens on the third failure, for twice as long on each
+    failed probe, up to the maximum."""
+    breaker = CircuitBreaker(threshold=3, base=10, maximum=60, jitter=0)
+
+    delays = [breaker.failure() for _ in range(7)]
+
+    assert delays == [None, None, 10, 20, 40, 60, 60]
+    assert breaker.is_open
+    assert not breaker.allow()
+    assert 59 < breaker.retry_in() <= 60
+
+
+def test_jitter_stays_within_bounds():
+    """Jitter moves each delay by at most its fraction of it."""
+    delays = []
+    for _ in range(50):
+        breaker = CircuitBreaker(threshold=1, base=10, jitter=0.2)
+        delays.append(breaker.failure())
+
+    assert all(8 <= delay <= 12 for delay in delays)
+
+
+async def test_opens_after_three_failures(simulator, client):
+    """After three failed polls the Logger is left alone."""
+    simulator.status = 500
+    for _ in range(3):
+        with pytest.raises(UnexpectedError):
+            await client.update()
+
+    with pytest.raises(CircuitOpenError):
+        await client.update()
+    assert simulator.requests == 3
+    assert client.breaker.is_open
+
+
+async def test_closes_on_first_success(simulator, client, caplog):
+    """The probe after the retry time closes the circuit when it succeeds."""
+    simulator.status = 500
+    for _ in range(3):
+        with pytest.raises(UnexpectedError):
+            await client.update()
+    simulator.status = 200
+    client.breaker._retry_at = time.monotonic()
+    caplog.set_level(logging.INFO)
+
+    await client.update()
+
+    assert not client.breaker.is_open
+    assert client.breaker.failures == 0
+    assert "is reachable again" in caplog.text
+
+
+async def test_failed_probe_doubles_backoff(simulator, client):
+    """A failed probe opens the circuit for twice as long."""
+    client.breaker._jitter = 0
+    simulator.status = 500
+    for _ in range(3):
+        with pytest.raises(UnexpectedError):
+            await client.update()
+    client.breaker._retry_at = time.monotonic()
+
+    with pytest.raises(UnexpectedError):
+        await client.update()
+
+    assert simulator.requests == 4
+    assert 19 < client.breaker.retry_in() <= 20
+
+
+async def test_logs_name_of_error_without_message(client, caplog):
+    """An error without a message, as a timeout, is logged by its name."""
+
+    async def time_out():
+        raise asyncio.TimeoutError()
+
+    client._get_sensor_data = time_out
+    for _ in range(3):
+        with pytest.raises(asyncio.TimeoutError):
+            await client.update()
+
+    assert "failed 3 times (TimeoutError)" in caplog.text
@@ -0,0 +1,76 @@
+"""Tests of the values derived from each poll and from batches of them."""
+import math
+
+import pytest
+
+from custom_components.mbweather.derived import (
+    DERIVED,
+    DERIVED_KEYS,
+    SOURCE_KEYS,
+    beaufort,
+    derive,
+    wet_bulb,
+)
+from custom_components.mbweather.meteobridge import (
+    TEMPLATE,
+    Conversion,
+    Meteobridge,
+    decode_batch,
+)
+
+from .simulator import PASSWORD, USERNAME, MeteobridgeSimulator
+
+
+def _derive(data, unit_system="metric"):
+    """Return the values of DERIVED by key for a dict of metric values."""
+    plan = Conversion().plan([kind for _, _, _, kind, _ in DERIVED], unit_system)
+    values = [data.get(key) for key in SOURCE_KEYS]
+    return dict(zip(DERIVED_KEYS, derive(values, plan)))
+
+
+def test_known_values():
+    """Spot checks against published values."""
+    assert wet_bulb(20, 50) == pytest.approx(13.7, abs=0.05)
+    assert beaufort(0.4) == 0
+    assert beaufort(5.0) == 3
+    assert beaufort(33) == 12
+
+
+def test_cloud_base_in_feet_for_imperial():
+    """Heights are converted to ft for imperial setups."""
+    data = {"temperature": 20.0, "dewpoint": 10.0}
+    metric = _derive(data)
+    imperial = _derive(data, "imperial")
+
+    assert metric["cloud_base"] == 1250
+    assert imperial["cloud_base"] == 4101
+
+
+def test_missing_source_gives_none():
+    """A value is None when one of its sources is missing."""
+    data = {"temperature": 20.0, "humidity": None, "dewpoint": 10.0}
+    derived = _derive(data)
+
+    assert derived["wetbulb"] is None
+    assert derived["cloud_base"] == 1250
+
+
+@pytest.mark.parametrize("unit_system", ["metric", "imperial"])
+async def test_batch_matches_polls(unit_system):
+    """decode_batch derives the same values as each poll does."""
+    simulator = MeteobridgeSimulator()
+    simulator.missing = {"th0hum-act"}
+    payloads = [simulator.payload(TEMPLATE) for _ in range(5)]
+    simulator.missing = set()
+    payloads += [simulator.payload(TEMPLATE) for _ in range(200)]
+    client = Meteobridge(None, "192.0.2.1", USERNAME, PASSWORD, unit_system)
+    polled = []
+    for payload in payloads:
+        client.push(payload)
+        polled.append(dict(await client.update()))
+
+    _, columns = decode_batch(payloads, unit_system)
+
+    for key in DERIVED_KEYS:
+        batch = [None if math.isnan(value) else value for value in columns[key]]
+        assert batch == [data[key] for data in polled], key
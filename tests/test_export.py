@@ -0,0 +1,119 @@
+"""Tests of the export of polled data to a file or UNIX socket."""
+import asyncio
+import json
+import struct
+import time
+
+import pytest
+
+from custom_components.mbweather import export
+from custom_components.mbweather.export import Exporter, FileSink, SocketSink
+
+
+async def _read_frames(reader, frames: list) -> None:
+    """Append every length-prefixed JSON record of reader to frames."""
+    try:
+        while True:
+            (length,) = struct.unpack(">I", await reader.readexactly(4))
+            frames.append(json.loads(await reader.readexactly(length)))
+    except asyncio.IncompleteReadError:
+        pass
+
+
+@pytest.fixture
+async def reader(tmp_path):
+    """A UNIX socket reading records into frames."""
+    path = str(tmp_path / "export.sock")
+    frames = []
+    server = await asyncio.start_unix_server(
+        lambda reader, writer: _read_frames(reader, frames), path
+    )
+    yield path, frames
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.fixture
+async def stalled_reader(tmp_path):
+    """A UNIX socket that accepts connections but never reads."""
+    path = str(tmp_path / "stalled.sock")
+    writers = []
+    server = await asyncio.start_unix_server(
+        lambda reader, writer: writers.append(writer), path
+    )
+    yield path
+    for writer in writers:
+        writer.close()
+    server.close()
+    await server.wait_closed()
+
+
+async def test_file_sink_rotates(tmp_path):
+    """A full file is rotated, keeping backups files."""
+    path = str(tmp_path / "export.jsonl")
+    sink = FileSink(path, max_bytes=100, backups=2)
+
+    for index in range(5):
+        await sink.write([{"index": index, "padding": "x" * 40}])
+
+    with open(path) as current, open(path + ".1") as previous:
+        assert json.loads(current.read())["index"] == 4
+        assert json.loads(previous.read())["index"] == 3
+    assert (tmp_path / "export.jsonl.2").exists()
+    assert not (tmp_path / "export.jsonl.3").exists()
+
+
+async def test_socket_sink_frames_records(reader):
+    """Records arrive at the reader in order, one frame each."""
+    path, frames = reader
+    exporter = Exporter(SocketSink(path))
+    exporter.start()
+
+    for index in range(250):
+        exporter.add({"station": "roof", "index": index})
+    await exporter.close()
+    await asyncio.sleep(0.1)
+
+    assert [frame["index"] for frame in frames] == list(range(250))
+    assert exporter.dropped == 0
+
+
+def test_full_queue_drops_oldest():
+    """Records are dropped oldest first, and counted."""
+    exporter = Exporter(SocketSink("/nonexistent"), queue_size=2)
+
+    for index in range(3):
+        exporter.add({"index": index})
+
+    assert exporter.dropped == 1
+    assert [record["index"] for record in exporter._queue] == [1, 2]
+
+
+async def test_stalled_reader_is_dropped(stalled_reader, monkeypatch):
+    """A reader that stops reading is disconnected instead of blocking."""
+    monkeypatch.setattr(export, "SOCKET_WRITE_TIMEOUT", 0.2)
+    sink = SocketSink(stalled_reader)
+    batch = [{"padding": "x" * 10000}] * 100
+
+    start = time.monotonic()
+    for _ in range(20):
+        await sink.write(batch)
+        if sink._writer is None:
+            break
+
+    assert sink._writer is None
+    assert time.monotonic() - start < 2
+
+
+async def test_close_gives_up_on_stalled_reader(stalled_reader):
+    """Stopping does not wait for a stalled reader for more than timeout."""
+    exporter = Exporter(SocketSink(stalled_reader))
+    exporter.start()
+    for _ in range(1000):
+        exporter.add({"padding": "x" * 10000})
+
+    start = time.monotonic()
+    await exporter.close(timeout=0.5)
+
+    assert time.monotonic() - start < 1
+    assert exporter.dropped > 0
@@ -0,0 +1,139 @@
+"""Tests of the history store and the aggregates restored from it."""
+import math
+import time
+
+import pytest
+
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from custom_components.mbweather import (
+    CONFIG_SCHEMA,
+    DOMAIN,
+    _async_backfill,
+    _recorded_update,
+    async_setup,
+)
+from custom_components.mbweather.history import HistoryStore
+from custom_components.mbweather.meteobridge import NUMERIC_KEYS, Meteobridge
+
+from .simulator import PASSWORD, USERNAME, MeteobridgeSimulator
+
+
+@pytest.fixture
+def history(tmp_path):
+    """An empty history of the numeric keys."""
+    return HistoryStore(str(tmp_path), NUMERIC_KEYS)
+
+
+def test_query_returns_records_in_range(history):
+    """Records are read back as columns, from start up to end, across days."""
+    start = 1780272000  # 2026-06-01 00:00 UTC
+    history.write(
+        [
+            history.record(start + hour * 3600, {"temperature": hour})
+            for hour in range(48)
+        ]
+    )
+
+    columns = history.query(start + 20 * 3600, start + 30 * 3600)
+
+    assert list(columns["time"]) == [start + hour * 3600 for hour in range(20, 30)]
+    assert list(columns["temperature"]) == list(range(20, 30))
+    assert all(math.isnan(value) for value in columns["pressure"])
+
+
+async def test_restore_aggregates_from_window(simulator, history):
+    """After a restart the aggregates cover the values recorded before it."""
+    now = time.time()
+    history.write(
+        [history.record(now - 7200, {"temperature": 40.0})]
+        + [
+            history.record(now - age, {"temperature": 30.0, "windgust": 25.0})
+            for age in (3000, 300)
+        ]
+    )
+    client = Meteobridge(None, simulator.host, USERNAME, PASSWORD, "metric")
+
+    client.restore_aggregates(history.window(3 * 3600))
+    data = await client.update()
+    await client.close()
+
+    assert data["temp_max_1h"] == 30.0
+    assert data["windgust_max_10m"] == 25.0
+    assert data["temp_trend_3h"] == round(data["temperature"] - 40.0, 1)
+
+
+async def test_records_stamped_with_logger_time(hass, simulator, history):
+    """Polls are recorded at the time of their Observation, once each."""
+    client = Meteobridge(None, simulator.host, USERNAME, PASSWORD, "metric")
+    update = _recorded_update(hass, "roof", client.update, client, history, False)
+
+    first = dict(await update())
+    simulator.advance_on_request = False
+    await update()
+    await hass.async_block_till_done()
+    await client.close()
+
+    columns = history.query(first["timestamp"] - 3600, first["timestamp"] + 3600)
+    assert list(columns["time"]) == [first["timestamp"]]
+    assert list(columns["temperature"]) == [first["temperature"]]
+
+
+async def test_backfill_fills_gap(hass, history, host_time_zone):
+    """A Logger that keeps history sends the rows of the gap, queried in
+    its own local time."""
+    simulator = MeteobridgeSimulator(history=True, advance=False)
+    await simulator.start()
+    client = Meteobridge(None, simulator.host, USERNAME, PASSWORD, "metric")
+    start = (await client.update())["timestamp"]
+    simulator.advance(30)
+    end = (await client.update())["timestamp"]
+
+    await _async_backfill(hass, "roof", client, history, start, end)
+    await client.close()
+    await simulator.close()
+
+    columns = history.query(start, end + 1)
+    assert list(columns["time"]) == [start + 10 * step for step in range(1, 30)]
+
+
+async def test_backfill_warns_without_history(hass, simulator, history, caplog):
+    """A Logger ignoring the history query only sends its current row."""
+    client = Meteobridge(None, simulator.host, USERNAME, PASSWORD, "metric")
+    now = (await client.update())["timestamp"]
+
+    await _async_backfill(hass, "roof", client, history, now - 600, now)
+    await client.close()
+
+    assert "does not seem to support history queries" in caplog.text
+
+
+async def test_setup_backfills_downtime(hass):
+    """At startup the rows recorded since the last stored one are fetched."""
+    simulator = MeteobridgeSimulator(history=True, advance=False)
+    await simulator.start()
+    start = simulator.series.time
+    history = HistoryStore(hass.config.path(STORAGE_DIR, DOMAIN, "roof"), NUMERIC_KEYS)
+    history.write([history.record(start, {"temperature": 20.0})])
+    simulator.advance(360)
+    config = CONFIG_SCHEMA(
+        {
+            DOMAIN: {
+                "host": simulator.host,
+                "username": USERNAME,
+                "password": PASSWORD,
+                "name": "roof",
+                "history_days": 1,
+                "backfill": True,
+            }
+        }
+    )
+
+    assert await async_setup(hass, config)
+    await hass.async_block_till_done()
+    await hass.async_stop(force=True)
+    await simulator.close()
+
+    now = simulator.series.time
+    columns = history.query(start, now + 1)
+    assert list(columns["time"]) == [start + 10 * step for step in range(361)]
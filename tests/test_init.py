@@ -0,0 +1,185 @@
+"""Tests of the mbweather configuration and setup."""
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+
+import pytest
+import voluptuous as vol
+
+from custom_components.mbweather import CONFIG_SCHEMA, DOMAIN, async_setup
+from custom_components.mbweather.const import MAX_CONCURRENT_POLLS
+
+from .simulator import PASSWORD, USERNAME, MeteobridgeSimulator
+
+
+def _station(**options):
+    """Return the configuration of a station."""
+    return {
+        "host": "192.168.1.10",
+        "username": USERNAME,
+        "password": PASSWORD,
+        **options,
+    }
+
+
+def test_config_accepts_named_stations():
+    """Stations with names of their own are accepted."""
+    config = CONFIG_SCHEMA(
+        {DOMAIN: [_station(name="roof"), _station(host="192.168.1.11", name="garden")]}
+    )
+
+    assert [station["name"] for station in config[DOMAIN]] == ["roof", "garden"]
+
+
+def test_config_rejects_duplicate_names():
+    """Two stations of the same name would replace one another."""
+    with pytest.raises(vol.Invalid, match="roof is used more than once"):
+        CONFIG_SCHEMA({DOMAIN: [_station(name="roof"), _station(name="roof")]})
+
+
+def test_config_rejects_several_default_names():
+    """Several stations need a name, as they would all get the default one."""
+    with pytest.raises(vol.Invalid, match="more than once"):
+        CONFIG_SCHEMA({DOMAIN: [_station(), _station(host="192.168.1.11")]})
+
+
+async def test_setup_polls_without_http(hass, simulator):
+    """A station that is polled does not need the http component."""
+    config = CONFIG_SCHEMA({DOMAIN: [_station(host=simulator.host)]})
+
+    assert await async_setup(hass, config)
+    await hass.async_block_till_done()
+
+    assert hass.data[DOMAIN]["coordinator"].last_update_success
+    assert simulator.requests == 1
+    assert "http" not in hass.config.components
+
+
+async def test_dump_stats_logs_invalid_sensors(hass, simulator, caplog):
+    """The dump lists the sensors that lost their value, with the last one."""
+    config = CONFIG_SCHEMA({DOMAIN: [_station(host=simulator.host)]})
+    assert await async_setup(hass, config)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN]["coordinator"]
+    humidity = coordinator.data["humidity"]
+
+    simulator.missing = {"th0hum-act"}
+    await coordinator.async_refresh()
+    caplog.set_level(logging.INFO)
+    await hass.services.async_call(DOMAIN, "dump_stats", blocking=True)
+
+    mb_server = hass.data[DOMAIN]["mb"]
+    assert mb_server.age("humidity") > 0
+    assert mb_server.age("temperature") == 0
+    assert f"humidity (last {humidity}, " in caplog.text
+
+
+async def test_dump_stats_logs_stage_histograms(hass, simulator, caplog):
+    """The dump holds the histograms of every timed stage of a poll."""
+    config = CONFIG_SCHEMA({DOMAIN: [_station(host=simulator.host)]})
+    assert await async_setup(hass, config)
+    await hass.async_block_till_done()
+    caplog.set_level(logging.INFO)
+
+    await hass.services.async_call(DOMAIN, "dump_stats", blocking=True)
+
+    assert "Poll statistics of mbweather" in caplog.text
+    for stage in ("connect", "response", "decode", "convert", "poll"):
+        assert f"'{stage}': {{'count': 1," in caplog.text
+
+
+async def test_stations_share_decode_workers(hass, simulator):
+    """Stations with decode workers share one pool, as large as the largest
+    asked for, which is shut down with Home Assistant."""
+    config = CONFIG_SCHEMA(
+        {
+            DOMAIN: [
+                _station(host=simulator.host, name="roof", decode_workers=2),
+                _station(host=simulator.host, name="garden", decode_workers=4),
+                _station(host=simulator.host, name="shed"),
+            ]
+        }
+    )
+    assert await async_setup(hass, config)
+    await hass.async_block_till_done()
+
+    stations = hass.data[DOMAIN]["stations"]
+    executor = stations["roof"]["mb"]._executor
+    assert executor._max_workers == 4
+    assert stations["garden"]["mb"]._executor is executor
+    assert stations["shed"]["mb"]._executor is None
+    await hass.async_stop(force=True)
+    assert executor._shutdown_thread
+
+
+def test_import_loads_no_optional_features():
+    """Push, export, history and decode workers are only imported when
+    a station uses them."""
+    code = (
+        "import sys, custom_components.mbweather; "
+        "print(' '.join(sorted(sys.modules)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stdout=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    )
+
+    modules = set(result.stdout.split())
+    assert "custom_components.mbweather" in modules
+    for module in (
+        "custom_components.mbweather.push",
+        "custom_components.mbweather.export",
+        "custom_components.mbweather.history",
+        "homeassistant.components.http",
+        "concurrent.futures.process",
+    ):
+        assert module not in modules
+
+
+async def test_polls_in_flight_are_capped(hass):
+    """However many stations start at once, at most MAX_CONCURRENT_POLLS
+    requests are in flight."""
+    slow = MeteobridgeSimulator(delay=0.3)
+    await slow.start()
+    count = MAX_CONCURRENT_POLLS + 3
+    config = CONFIG_SCHEMA(
+        {DOMAIN: [_station(host=slow.host, name=f"s{index}") for index in range(count)]}
+    )
+
+    assert await async_setup(hass, config)
+    await hass.async_block_till_done()
+    await hass.async_stop(force=True)
+    await slow.close()
+
+    assert slow.requests == count
+    assert slow.max_in_flight == MAX_CONCURRENT_POLLS
+
+
+async def test_slow_station_does_not_delay_others(hass, simulator):
+    """A station starts polling on its first data, while another one still
+    waits for its slow Logger."""
+    slow = MeteobridgeSimulator(delay=3)
+    await slow.start()
+    config = CONFIG_SCHEMA(
+        {
+            DOMAIN: [
+                _station(host=slow.host, name="slow", scan_interval=1),
+                _station(host=simulator.host, name="fast", scan_interval=1),
+            ]
+        }
+    )
+
+    assert await async_setup(hass, config)
+    await asyncio.sleep(2.5)
+
+    stations = hass.data[DOMAIN]["stations"]
+    assert stations["fast"]["coordinator"].data is not None
+    assert simulator.requests >= 2
+    assert stations["slow"]["coordinator"].data is None
+    await hass.async_stop(force=True)
+    await slow.close()
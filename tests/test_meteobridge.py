@@ -0,0 +1,146 @@
+"""Tests of the Meteobridge client against the simulated Logger."""
+import time
+
+import pytest
+
+from custom_components.mbweather.meteobridge import (
+    FAST_TEMPLATE,
+    SLOW_INTERVAL,
+    TEMPLATE,
+    Meteobridge,
+    UnexpectedError,
+)
+
+from .simulator import PASSWORD, USERNAME
+
+
+def _shown(value, decimals=1):
+    """Return a value as the Logger sends it."""
+    return float(f"{value:.{decimals}f}")
+
+
+async def test_update_decodes_poll(simulator, client):
+    """A poll is decoded into the sensor_data keys."""
+    data = await client.update()
+
+    values = simulator.series.values
+    assert simulator.templates == [TEMPLATE]
+    assert data["temperature"] == _shown(values["th0temp-act"])
+    assert data["pressure"] == _shown(values["thb0seapress-act"])
+    assert data["windgust"] == _shown(values["wind0wind-max1"])
+    assert data["windbearing"] == int(_shown(values["wind0dir-avg5"], 0))
+    assert data["raining"] is (values["rain0rate-act"] > 0)
+    assert data["forecast"] == values["forecast-text"]
+    assert client.last_update is not None
+
+
+async def test_update_converts_imperial(simulator):
+    """Imperial setups get °F, inHg and mph."""
+    client = Meteobridge(None, simulator.host, USERNAME, PASSWORD, "imperial")
+    data = await client.update()
+    await client.close()
+
+    values = simulator.series.values
+    assert data["temperature"] == round(_shown(values["th0temp-act"]) * 1.8 + 32, 1)
+    assert data["pressure"] == round(
+        _shown(values["thb0seapress-act"]) * 0.0295299801647, 3
+    )
+    assert data["windgust"] == round(_shown(values["wind0wind-max1"]) * 2.2369362921, 1)
+
+
+async def test_update_keeps_values_between_polls(simulator, client):
+    """Each poll replaces the values of the previous one."""
+    first = dict(await client.update())
+    second = dict(await client.update())
+
+    assert second["time"] != first["time"]
+    assert second["temperature"] == _shown(simulator.series.values["th0temp-act"])
+
+
+async def test_update_ignores_host_time_zone(simulator, client, host_time_zone):
+    """The timestamp is the UTC epoch and the time the Logger local time,
+    whatever the time zone of the host."""
+    data = await client.update()
+
+    when = simulator.series.time
+    local = time.gmtime(when + simulator.utc_offset)
+    assert data["timestamp"] == when
+    assert data["time"] == time.strftime("%d-%m-%Y %H:%M:%S", local)
+
+
+async def test_identical_poll_changes_diagnostics_only(simulator, client):
+    """A poll that repeats the last one only changes the diagnostics."""
+    simulator.advance_on_request = False
+    await client.update()
+    await client.update()
+
+    assert client.changed <= set(client.stats.sensor_data())
+
+
+async def test_extra_data_write_is_a_change(simulator, client):
+    """A value written to the sensor data, as the weather condition, shows
+    as changed on the next poll only."""
+    simulator.advance_on_request = False
+    await client.update()
+    client.sensor_data["condition"] = "sunny"
+
+    await client.update()
+    assert "condition" in client.changed
+    await client.update()
+    assert "condition" not in client.changed
+
+
+async def test_polls_between_full_ones_are_fast(simulator, client):
+    """Only the FAST fields are requested until the SLOW ones are due."""
+    await client.update()
+    await client.update()
+
+    assert simulator.templates == [TEMPLATE, FAST_TEMPLATE]
+
+
+async def test_fast_poll_keeps_slow_fields(simulator, client):
+    """A fast poll takes the SLOW fields from the last full one."""
+    first = dict(await client.update())
+    simulator.missing = {"th0temp-ymax", "th0lowbat-act", "forecast-text"}
+    second = dict(await client.update())
+
+    for key in ("temp_ymax", "forecast", "lowbattery"):
+        assert second[key] == first[key]
+    assert second["temperature"] == _shown(simulator.series.values["th0temp-act"])
+
+
+async def test_full_poll_when_slow_fields_are_due(simulator, client):
+    """The full template is requested again SLOW_INTERVAL after the last."""
+    await client.update()
+    client._full_time -= SLOW_INTERVAL
+    await client.update()
+
+    assert simulator.templates == [TEMPLATE, TEMPLATE]
+
+
+async def test_fast_poll_fails_on_field_count(simulator, client):
+    """A fast answer without the fields of FAST_TEMPLATE fails the update."""
+    await client.update()
+    client._fast_url = client._url
+
+    with pytest.raises(UnexpectedError, match="fields"):
+        await client.update()
+
+
+async def test_update_fails_on_error_status(simulator, client):
+    """An error answer of the Logger fails the update."""
+    simulator.status = 500
+
+    with pytest.raises(UnexpectedError):
+        await client.update()
+    assert client.last_update is None
+
+
+async def test_update_reuses_one_connection(simulator, client):
+    """Polls share one kept-alive connection to the Logger."""
+    for _ in range(20):
+        await client.update()
+
+    assert simulator.requests == 20
+    assert simulator.connections == 1
+    assert client.stats.stages["connect"].count == 1
@@ -0,0 +1,107 @@
+"""Tests of the receiver of data pushed by a Logger."""
+from datetime import timedelta
+import logging
+import time
+
+import aiohttp
+from aiohttp import web
+import pytest
+
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from custom_components.mbweather import _checked_update
+from custom_components.mbweather.meteobridge import TEMPLATE, Meteobridge
+from custom_components.mbweather.push import PUSH_URL, MeteobridgePushView
+
+from .simulator import PASSWORD, USERNAME, MeteobridgeSimulator
+
+_LOGGER = logging.getLogger(__name__)
+
+PAYLOADS = 500
+
+
+@pytest.fixture
+async def station(hass):
+    """A station that only pushes its data, as set up by async_setup."""
+    mb_server = Meteobridge(
+        None, "192.0.2.1", USERNAME, PASSWORD, "metric", push_only=True
+    )
+    coordinator = DataUpdateCoordinator(
+        hass,
+        _LOGGER,
+        name="roof",
+        update_method=_checked_update(mb_server.update),
+        update_interval=timedelta(seconds=20),
+    )
+    yield {
+        "coordinator": coordinator,
+        "mb": mb_server,
+        "push": True,
+        "auth": aiohttp.BasicAuth(USERNAME, PASSWORD),
+    }
+    await mb_server.close()
+
+
+@pytest.fixture
+async def push_url(hass, station):
+    """The URL to push the data of the station to."""
+    app = web.Application()
+    app["hass"] = hass
+    MeteobridgePushView({"roof": station}).register(app, app.router)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}{PUSH_URL.format(station='roof')}"
+    await runner.cleanup()
+
+
+async def test_replayed_payloads_update_coordinator(station, push_url):
+    """Payloads pushed back to back each reach the coordinator, without a
+    single poll of the Logger."""
+    simulator = MeteobridgeSimulator()
+    coordinator = station["coordinator"]
+    updates = []
+    coordinator.async_add_listener(lambda: updates.append(time.perf_counter()))
+    latencies = []
+
+    auth = aiohttp.BasicAuth(USERNAME, PASSWORD)
+    async with aiohttp.ClientSession(auth=auth) as session:
+        for _ in range(PAYLOADS):
+            payload = simulator.payload(TEMPLATE)
+            start = time.perf_counter()
+            async with session.post(push_url, data=payload) as response:
+                assert response.status == 200
+            latencies.append(updates[-1] - start)
+
+    assert len(updates) == PAYLOADS
+    assert coordinator.last_update_success
+    assert coordinator.data["temperature"] == round(
+        simulator.series.values["th0temp-act"], 1
+    )
+    # The Logger was never polled, so no session to it was opened
+    assert station["mb"].req is None
+    latencies.sort()
+    assert latencies[int(PAYLOADS * 0.99)] < 0.1
+
+
+async def test_push_rejects_wrong_password(station, push_url):
+    """A payload without the station password is refused."""
+    payload = MeteobridgeSimulator().payload(TEMPLATE)
+    auth = aiohttp.BasicAuth(USERNAME, "wrong")
+    async with aiohttp.ClientSession(auth=auth) as session:
+        async with session.post(push_url, data=payload) as response:
+            assert response.status == 401
+
+    assert station["coordinator"].data is None
+
+
+async def test_no_push_makes_station_unavailable(station):
+    """Without pushed data the station is not polled, but unavailable."""
+    coordinator = station["coordinator"]
+
+    await coordinator.async_refresh()
+
+    assert not coordinator.last_update_success
+    assert station["mb"].req is None
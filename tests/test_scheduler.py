@@ -0,0 +1,95 @@
+"""Tests of the poll scheduler, and of the adaptive poll interval replaying
+a simulated day."""
+from datetime import timedelta
+
+import pytest
+
+from custom_components.mbweather.meteobridge import Conversion
+from custom_components.mbweather.scheduler import (
+    AdaptiveInterval,
+    PollScheduler,
+    activity_thresholds,
+)
+
+from .simulator import WeatherSeries
+
+SCAN_INTERVAL = 10
+MAX_SCAN_INTERVAL = 300
+DAY = 86400
+
+
+def _replay(unit_system: str):
+    """Poll a simulated day at the adaptive interval. Returns the number of
+    polls, and the longest interval while it rained."""
+    conversion = Conversion()
+    plan = conversion.plan(["rate", "speed", "pressure"], unit_system)
+    series = WeatherSeries()
+    policy = AdaptiveInterval(
+        SCAN_INTERVAL, MAX_SCAN_INTERVAL, thresholds=activity_thresholds(unit_system)
+    )
+    now = series.time
+    end = now + DAY
+    polls = 0
+    rain_interval = 0
+    while now < end:
+        while series.time < now:
+            series.advance()
+        values = series.values
+        row = conversion.apply(
+            plan,
+            (
+                values["rain0rate-act"],
+                values["wind0wind-max1"],
+                values["thb0seapress-act"],
+            ),
+        )
+        data = dict(zip(("rainrate", "windgust", "pressure"), row))
+        interval = policy.update(data)
+        polls += 1
+        if data["rainrate"]:
+            rain_interval = max(rain_interval, interval)
+        now += interval
+    return polls, rain_interval
+
+
+def test_thresholds_follow_unit_system():
+    """Imperial thresholds are in mph and inHg, as the data they judge."""
+    metric = activity_thresholds("metric")
+    imperial = activity_thresholds("imperial")
+
+    assert metric == {"rainrate": 0.0, "windgust": 1.0, "pressure": 0.2}
+    assert imperial["windgust"] == pytest.approx(2.237, abs=0.001)
+    assert imperial["pressure"] == pytest.approx(0.0059, abs=0.0001)
+
+
+def test_replay_saves_polls():
+    """A steady day takes far fewer polls than one every scan interval,
+    without stretching the interval while it rains."""
+    polls, rain_interval = _replay("metric")
+
+    assert polls < DAY / SCAN_INTERVAL / 5
+    assert rain_interval == SCAN_INTERVAL
+
+
+def test_replay_same_in_imperial_units():
+    """The unit system does not change how often the Logger is polled."""
+    metric, _ = _replay("metric")
+    imperial, rain_interval = _replay("imperial")
+
+    assert imperial == pytest.approx(metric, rel=0.1)
+    assert rain_interval == SCAN_INTERVAL
+
+
+async def test_stations_are_staggered(hass):
+    """The slots of the stations are spread evenly over the interval."""
+    scheduler = PollScheduler(hass, 4)
+    stations = [object() for _ in range(4)]
+    for station in stations:
+        scheduler.add(station, timedelta(seconds=SCAN_INTERVAL))
+
+    scheduler.async_start()
+    slots = [scheduler._handles[index].when() for index in range(4)]
+    scheduler.async_stop()
+
+    first = min(slots)
+    assert sorted(slot - first for slot in slots) == pytest.approx([0, 2.5, 5, 7.5])
@@ -0,0 +1,74 @@
+"""Tests of the state writes of the sensor entities."""
+from datetime import timedelta
+import logging
+
+import pytest
+
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from custom_components.mbweather.sensor import MBWeatherSensor
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@pytest.fixture
+async def coordinator(hass, client):
+    """A coordinator updating the client, not refreshed yet."""
+    return DataUpdateCoordinator(
+        hass,
+        _LOGGER,
+        name="roof",
+        update_method=client.update,
+        update_interval=timedelta(seconds=10),
+    )
+
+
+async def _sensor(hass, coordinator, client, key):
+    """Return a sensor of key listening to the coordinator, counting its
+    state writes in writes."""
+    sensor = MBWeatherSensor(coordinator, client, key, "roof", "metric", "ms")
+    sensor.hass = hass
+    sensor.writes = 0
+
+    def write():
+        sensor.writes += 1
+
+    sensor.async_write_ha_state = write
+    await sensor.async_added_to_hass()
+    return sensor
+
+
+async def test_sensor_writes_only_its_changes(hass, simulator, client, coordinator):
+    """A sensor writes its state when its value changes, not on every poll."""
+    simulator.advance_on_request = False
+    temperature = await _sensor(hass, coordinator, client, "temperature")
+    humidity = await _sensor(hass, coordinator, client, "humidity")
+
+    await coordinator.async_refresh()
+    assert (temperature.writes, humidity.writes) == (1, 1)
+    await coordinator.async_refresh()
+    assert (temperature.writes, humidity.writes) == (1, 1)
+
+    simulator.series.values["th0temp-act"] += 1
+    await coordinator.async_refresh()
+    assert (temperature.writes, humidity.writes) == (2, 1)
+    await temperature.async_will_remove_from_hass()
+    await humidity.async_will_remove_from_hass()
+
+
+async def test_sensor_writes_when_availability_changes(
+    hass, simulator, client, coordinator
+):
+    """A sensor losing its value writes its state once, as unavailable."""
+    simulator.advance_on_request = False
+    humidity = await _sensor(hass, coordinator, client, "humidity")
+    await coordinator.async_refresh()
+
+    simulator.missing = {"th0hum-act"}
+    client._full_time = None
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+
+    assert humidity.writes == 2
+    assert not humidity.available
+    await humidity.async_will_remove_from_hass()
@@ -0,0 +1,67 @@
+"""Tests of the poll statistics."""
+import pytest
+
+from custom_components.mbweather.meteobridge import UnexpectedError
+from custom_components.mbweather.stats import Histogram, PollStats
+
+
+def test_percentile_reports_bucket_bounds():
+    """A percentile is the upper bound of the bucket it falls in."""
+    histogram = Histogram()
+    for _ in range(90):
+        histogram.add(0.0003)
+    for _ in range(10):
+        histogram.add(0.03)
+
+    assert histogram.percentile(50) == 0.0005
+    assert histogram.percentile(90) == 0.0005
+    assert histogram.percentile(95) == 0.05
+    assert histogram.percentile(99) == 0.05
+
+
+def test_percentile_of_last_bucket_is_mean():
+    """Durations beyond the last bound report their mean."""
+    histogram = Histogram()
+    histogram.add(20.0)
+    histogram.add(40.0)
+
+    assert histogram.percentile(50) == 30.0
+
+
+def test_percentile_without_samples_is_none():
+    """An empty histogram has no percentiles."""
+    assert Histogram().percentile(50) is None
+
+
+def test_sensor_data_in_ms():
+    """The diagnostic sensors report poll latencies in ms."""
+    stats = PollStats()
+    assert stats.sensor_data()["poll_p50"] is None
+    for _ in range(99):
+        stats.add("poll", 0.003)
+    stats.add("poll", 0.7)
+
+    data = stats.sensor_data()
+    assert data["poll_p50"] == 5
+    assert data["poll_p95"] == 5
+    assert data["poll_p99"] == 5
+    stats.add("poll", 0.7)
+    assert stats.sensor_data()["poll_p99"] == 1000
+
+
+async def test_polls_count_errors_and_bytes(simulator, client):
+    """Real polls count the bytes received and the failed polls."""
+    await client.update()
+    received = client.stats.bytes_received
+    await client.update()
+    simulator.status = 500
+    with pytest.raises(UnexpectedError):
+        await client.update()
+    simulator.status = 200
+    data = await client.update()
+
+    assert received > 0
+    assert data["bytes_received"] > received
+    assert data["poll_errors"] == 1
+    assert client.stats.stages["poll"].count == 3
+    assert client.stats.stages["connect"].count == 1
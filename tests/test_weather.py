@@ -0,0 +1,124 @@
+"""Tests of the Dark Sky client against a local stand-in server."""
+import asyncio
+
+import aiohttp
+from aiohttp import web
+import pytest
+
+from custom_components.mbweather.weather import DarkSkyData
+
+API_KEY = "abc123"
+RESPONSE = {
+    "flags": {"units": "ca"},
+    "currently": {"summary": "Clear", "temperature": 21.5},
+    "hourly": {"data": [{"time": 1780272000, "temperature": 20.0}]},
+    "daily": {
+        "data": [
+            {"time": 1780272000, "temperatureHigh": 24.0, "temperatureLow": 12.0},
+            {"time": 1780358400, "temperatureHigh": 22.0, "temperatureLow": 11.0},
+        ]
+    },
+}
+
+
+class DarkSkyServer:
+    """A local aiohttp server answering forecast requests like Dark Sky.
+
+    Every request is kept in requests. Tests can set status to answer with
+    an error, and delay to answer late."""
+
+    def __init__(self):
+        self.requests = []
+        self.status = 200
+        self.delay = 0.0
+        self.url = None
+        self._runner = None
+
+    async def start(self) -> None:
+        """Start serving on a free port of 127.0.0.1."""
+        app = web.Application()
+        app.router.add_get("/forecast/{key}/{location}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    async def close(self) -> None:
+        """Stop serving."""
+        await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests.append(request)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return web.Response(status=self.status, text="Error")
+        return web.json_response(RESPONSE)
+
+
+@pytest.fixture
+async def dark_sky():
+    """A stand-in Dark Sky, serving on a free local port."""
+    server = DarkSkyServer()
+    await server.start()
+    yield server
+    await server.close()
+
+
+@pytest.fixture
+async def session():
+    """A client session to reach the stand-in server with."""
+    async with aiohttp.ClientSession() as session:
+        yield session
+
+
+def _client(session, dark_sky, **options):
+    """Return a DarkSkyData asking the stand-in server."""
+    return DarkSkyData(
+        session, API_KEY, 55.6, 12.5, "da", "ca", url=dark_sky.url, **options
+    )
+
+
+async def test_update_queries_forecast(dark_sky, session):
+    """The forecast of the location is asked for in the units and language
+    set, without the sections that are not used."""
+    await _client(session, dark_sky).async_update()
+
+    (request,) = dark_sky.requests
+    assert request.path == f"/forecast/{API_KEY}/55.6,12.5"
+    assert request.query["exclude"] == "minutely,alerts"
+    assert request.query["units"] == "ca"
+    assert request.query["lang"] == "da"
+
+
+async def test_update_parses_sections(dark_sky, session):
+    """The current conditions and the hourly and daily forecasts are kept."""
+    data = _client(session, dark_sky)
+    await data.async_update()
+
+    assert data.currently == RESPONSE["currently"]
+    assert data.hourly == RESPONSE["hourly"]["data"]
+    assert data.daily == RESPONSE["daily"]["data"]
+    assert data.units == "ca"
+
+
+async def test_update_timeout_leaves_no_data(dark_sky, session):
+    """An answer that takes too long leaves no data."""
+    dark_sky.delay = 1
+    data = _client(session, dark_sky, timeout=0.1)
+    await data.async_update()
+
+    assert data.data is None
+    assert data.units is None
+
+
+async def test_update_error_status_leaves_no_data(dark_sky, session):
+    """An error answer leaves no data, where an earlier answer is dropped."""
+    data = _client(session, dark_sky)
+    await data.async_update()
+    dark_sky.status = 403
+    await data.async_update(no_throttle=True)
+
+    assert len(dark_sky.requests) == 2
+    assert data.data is None